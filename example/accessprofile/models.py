@@ -7,13 +7,20 @@ from django.contrib.auth.models import User, Group, Permission
 from access.plugins import CompoundPlugin, ApplyAblePlugin, CheckAblePlugin, DjangoAccessPlugin
 from access.managers import AccessManager
 
-from someapp.models import SomeObject, SomeChild
+from someapp.models import SomeObject, SomeChild, SomeLabel
+
+from tastycake.utils import request_cached
+
+
+def user_groups(request):
+    # The same user groups are used by rules of all resources touched by the request
+    return request_cached(request, 'user_groups', lambda: list(request.user.groups.values_list('pk', flat=True)))
 
 
 AccessManager.register_plugins({
     Permission:ApplyAblePlugin(visible=lambda queryset, request: queryset.filter(
             Q(user=request.user) |
-            Q(group__in=request.user.groups.all())
+            Q(group__in=user_groups(request))
         )),
     User:CompoundPlugin(
         DjangoAccessPlugin(),
@@ -39,18 +46,19 @@ AccessManager.register_plugins({
     SomeObject: CompoundPlugin(
         DjangoAccessPlugin(),
         ApplyAblePlugin(
-            visible=lambda queryset, request: queryset.filter(Q(editor_group__in=request.user.groups.all())|Q(viewer_groups__in=request.user.groups.all())),
-            changeable=lambda queryset, request: queryset.filter(Q(editor_group__in=request.user.groups.all())),
-            #deleteable=lambda queryset, request: queryset.filter(Q(editor_group__in=request.user.groups.all())).exclude(Q(children__is_archived=False)),
-            deleteable=lambda queryset, request: queryset.filter(Q(editor_group__in=request.user.groups.all())),
+            visible=lambda queryset, request: queryset.filter(Q(editor_group__in=user_groups(request))|Q(viewer_groups__in=user_groups(request))),
+            changeable=lambda queryset, request: queryset.filter(Q(editor_group__in=user_groups(request))),
+            #deleteable=lambda queryset, request: queryset.filter(Q(editor_group__in=user_groups(request))).exclude(Q(children__is_archived=False)),
+            deleteable=lambda queryset, request: queryset.filter(Q(editor_group__in=user_groups(request))),
         )
     ),
     SomeChild: CompoundPlugin(
         DjangoAccessPlugin(),
         ApplyAblePlugin(
-            visible=lambda queryset, request: queryset.filter(Q(is_archived=False)&(Q(parent__editor_group__in=request.user.groups.all())|Q(parent__viewer_groups__in=request.user.groups.all()))),
-            changeable=lambda queryset, request: queryset.filter(Q(parent__editor_group__in=request.user.groups.all())),
-            deleteable=lambda queryset, request: queryset.filter(Q(is_archived=True) & Q(parent__editor_group__in=request.user.groups.all())),
+            visible=lambda queryset, request: queryset.filter(Q(is_archived=False)&(Q(parent__editor_group__in=user_groups(request))|Q(parent__viewer_groups__in=user_groups(request)))),
+            changeable=lambda queryset, request: queryset.filter(Q(parent__editor_group__in=user_groups(request))),
+            deleteable=lambda queryset, request: queryset.filter(Q(is_archived=True) & Q(parent__editor_group__in=user_groups(request))),
         )
-    )
+    ),
+    SomeLabel: DjangoAccessPlugin(),
 })
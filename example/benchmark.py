@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Compares the original serializer with the fast one on every JSON backend available
+(orjson, ujson, the standard json module) on list, detail and schema payloads.
+
+Run from the example directory:
+
+    python benchmark.py [repeat]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+if __name__ == "__main__":
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tastycake_example.settings")
+
+    import django
+    django.setup()
+
+    import datetime
+    import decimal
+
+    from django.utils import timezone
+    from tastypie.bundle import Bundle
+
+    from tastycake.api import Serializer, FastSerializer
+    from tastycake_example.apiurls import api
+
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    def detail(i):
+        return Bundle(data={
+            'username': 'user%s' % i,
+            'first_name': 'First',
+            'last_name': 'Last',
+            'email': 'user%s@example.com' % i,
+            'is_superuser': False,
+            'is_active': True,
+            'is_staff': False,
+            'date_joined': timezone.now(),
+            'last_login': timezone.now(),
+            'birthday': datetime.date(2017, 11, 11),
+            'balance': decimal.Decimal('%s.10' % i),
+        })
+
+    payloads = [
+        ('list of 10000 keys', {
+            'meta': {'limit': 0, 'offset': 0, 'next': None, 'previous': None, 'total_count': 10000},
+            'objects': list(range(10000)),
+        }),
+        ('detail', detail(0)),
+        ('set of 1000 details', {'objects': [detail(i) for i in range(1000)]}),
+        ('schema', api.version_resources['v2'].build_schema(detailed=True)),
+    ]
+
+    serializers = [Serializer()]
+    for backend in FastSerializer.json_backends:
+        serializer = type(str('FastSerializer'), (FastSerializer,), {'json_backends': (backend,)})()
+        if serializer.json_backend == backend:
+            serializers.append(serializer)
+    for name, payload in payloads:
+        number = 10
+        results = []
+        for serializer in serializers:
+            elapsed = min(timeit.repeat(lambda: serializer.serialize(payload, 'application/json'), number=number, repeat=repeat)) / number
+            results.append(elapsed)
+        print('%-20s Serializer: %.3f ms' % (name, results[0] * 1000), '  '.join(
+            'FastSerializer(%s): %.3f ms x%.1f' % (s.json_backend, t * 1000, results[0] / t)
+            for s, t in zip(serializers[1:], results[1:])
+        ))
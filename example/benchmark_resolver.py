@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Compares resolving requests by URL patterns of all resources and by the dispatcher
+on the API with 1000 generated models.
+
+Run from the example directory:
+
+    python benchmark_resolver.py [models] [repeat]
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+if __name__ == "__main__":
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tastycake_example.settings")
+
+    import django
+    django.setup()
+
+    from django.db import models
+    from django.urls import RegexURLResolver
+
+    from tastycake.api import Api
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    for i in range(count):
+        type(str('BenchmarkModel%s' % i), (models.Model,), {
+            '__module__': 'someapp.models',
+            'name': models.CharField(max_length=32),
+        })
+
+    exclude = ['admin', 'auth', 'contenttypes', 'sessions', 'tastypie', 'access', 'access_tastypie']
+    api = Api(settings_local={
+        'urls': {'exclude': exclude},
+        'dispatcher': {'exclude': exclude, 'dispatcher': True},
+    })
+    resolver = RegexURLResolver(r'^/', api.urls)
+    dispatcher = api.version_resources['dispatcher']
+
+    def resolve_urls(path):
+        match = resolver.resolve('/urls/%s' % path)
+        return match.func, match.kwargs
+
+    def resolve_dispatcher(path):
+        match = resolver.resolve('/dispatcher/%s' % path)
+        return dispatcher.route(match.kwargs['path'])
+
+    last = 'benchmarkmodel%s' % (count - 1)
+    paths = [
+        ('list', 'someapp/%s/' % last),
+        ('detail', 'someapp/%s/1/' % last),
+        ('relation method', 'someapp/%s/1/name/add/' % last),
+        ('not found', 'someapp/nothing/1/'),
+    ]
+
+    for name, path in paths:
+        results = []
+        for resolve in (resolve_urls, resolve_dispatcher):
+            def run():
+                try:
+                    resolve(path)
+                except Exception:
+                    pass
+            number = 100
+            results.append(min(timeit.repeat(run, number=number, repeat=repeat)) / number)
+        print('%-16s urls: %.3f ms  dispatcher: %.3f ms  x%.1f' % (name, results[0] * 1000, results[1] * 1000, results[0] / results[1]))
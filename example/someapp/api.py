@@ -25,6 +25,10 @@ def contenttype_find_by_url(self, request, method=None, **kwargs):
 def contenttype_url(self, request, obj, method=None, **kwargs):
     return {"url":'/'.join(["",obj.app_label, obj.model])}
 
+def somechild_dehydrate(self, bundle):
+    bundle.data['parent_name'] = bundle.obj.parent.name
+    return bundle
+
 def authentication(model):
     return SessionAuthentication()
 
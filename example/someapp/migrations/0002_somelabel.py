@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 17:41
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('someapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SomeLabel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80, verbose_name='Name')),
+            ],
+            options={
+                'verbose_name': 'Some Label',
+                'verbose_name_plural': 'Some Labels',
+            },
+        ),
+        migrations.AddField(
+            model_name='somelabel',
+            name='target',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='label', to='someapp.SomeObject', verbose_name='Target'),
+        ),
+    ]
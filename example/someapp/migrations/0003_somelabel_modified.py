@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.29 on 2026-10-17 18:09
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('someapp', '0002_somelabel'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='somelabel',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, verbose_name='Modified'),
+        ),
+    ]
@@ -37,3 +37,15 @@ class SomeChild(Model):
     class Meta:
         verbose_name = _("Some Child")
         verbose_name_plural = _("Some Childs")
+
+class SomeLabel(Model):
+    target = models.OneToOneField(SomeObject,verbose_name=_("Target"), null=True, blank=True, related_name='label')
+    name = models.CharField(max_length=80,verbose_name=_("Name"))
+    modified = models.DateTimeField(auto_now=True,verbose_name=_("Modified"))
+
+    def __unicode__(self):
+        return _("Label: %s") % self.name
+
+    class Meta:
+        verbose_name = _("Some Label")
+        verbose_name_plural = _("Some Labels")
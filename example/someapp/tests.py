@@ -1,3 +1,809 @@
-from django.test import TestCase
+from __future__ import print_function
 
-# Create your tests here.
+from django.test import TestCase as _TestCase
+from django.test import Client
+
+import json
+
+
+class TestCase(_TestCase):
+    if not hasattr(_TestCase,'assertRegex'):
+        assertRegex = _TestCase.assertRegexpMatches
+    if not hasattr(_TestCase,'assertNotRegex'):
+        assertNotRegex = _TestCase.assertNotRegexpMatches
+
+class TestBase(TestCase):
+    def setUp(self):
+        from django.contrib.auth.models import User, Group
+
+        self.user = User.objects.create(username="test",is_active=True,is_staff=True,is_superuser=True)
+        self.user.set_password("test")
+        self.user.save()
+        self.group = Group.objects.create(name="some")
+        self.other_group = Group.objects.create(name="other")
+        self.group.user_set.add(self.user)
+
+        self.client = Client()
+        self.client.login(username='test',password='test')
+
+    def get_json(self, path, status_code=200, **kwargs):
+        response = self.client.get(path, **kwargs)
+        self.assertEqual(response.status_code, status_code, response.content)
+        return json.loads(response.content.decode('utf-8'))
+
+    def get_resource(self, version, application, model):
+        from tastycake_example.apiurls import api
+        return api.version_resources[version].application_resources[application].model_resources[model]
+
+class SchemaCacheTest(TestBase):
+    def test_1_etag_not_modified(self):
+        for path in ('/api/', '/api/v1/', '/api/v1/auth/', '/api/v1/auth/user/schema/'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+
+    def test_2_invalidate(self):
+        from tastycake_example.apiurls import api
+        version = api.version_resources['v1']
+        self.client.get('/api/v1/')
+        self.assertTrue(version._schema_cache)
+        api.invalidate_caches()
+        self.assertFalse(version._schema_cache)
+        self.assertFalse(version.application_resources['auth']._schema_cache)
+
+class FieldPathTest(TestBase):
+    def test_1_resolve(self):
+        from django.contrib.auth.models import Group
+        resource = self.get_resource('v1', 'auth', 'user')
+        path = resource.resolve_field_path('groups__name__icontains')
+        self.assertEqual(path.model, Group)
+        self.assertEqual(path.field.name, 'name')
+        self.assertTrue(path.many)
+        self.assertFalse(resource.resolve_field_path('username').many)
+
+    def test_2_cached(self):
+        resource = self.get_resource('v2', 'auth', 'user')
+        resource.invalidate_caches()
+        for i in range(2):
+            self.get_json('/api/v2/auth/user/?filter={"password":"x"}', status_code=400)
+        self.assertEqual(resource.field_path_cache.misses, 1)
+        self.assertEqual(resource.field_path_cache.hits, 1)
+
+class FilterCacheTest(TestBase):
+    def test_1_same_shape(self):
+        resource = self.get_resource('v1', 'auth', 'group')
+        resource.invalidate_caches()
+        data = self.get_json('/api/v1/auth/group/?filter={"or":[{"name":"some"},{"name":null}]}')
+        self.assertEqual(data['objects'], [self.group.id])
+        data = self.get_json('/api/v1/auth/group/?filter={"or":[{"name":"other"},{"name":null}]}')
+        self.assertEqual(data['objects'], [self.other_group.id])
+        self.assertEqual(resource.filter_cache.misses, 1)
+        self.assertEqual(resource.filter_cache.hits, 1)
+
+    def test_2_field_reference(self):
+        data = self.get_json('/api/v1/auth/group/?filter={"not":{"name":"~name"}}')
+        self.assertEqual(data['objects'], [])
+        self.get_json('/api/v1/auth/group/?filter={"or":[]}', status_code=400)
+
+class DistinctTest(TestBase):
+    def test_1_only_for_many_joins(self):
+        from django.contrib.auth.models import User
+        resource = self.get_resource('v1', 'auth', 'user')
+        self.assertFalse(resource.apply_distinct(User.objects.filter(username='test')).query.distinct)
+        self.assertFalse(resource.apply_distinct(User.objects.order_by('-id')).query.distinct)
+        self.assertTrue(resource.apply_distinct(User.objects.filter(groups__name='some')).query.distinct)
+        self.assertTrue(resource.apply_sorting(User.objects.all(), {'order_by': 'groups__name'}).query.distinct)
+        self.assertFalse(resource.apply_sorting(User.objects.all(), {'order_by': '-username'}).query.distinct)
+
+    def test_2_no_repeated_rows(self):
+        self.other_group.user_set.add(self.user)
+        data = self.get_json('/api/v1/auth/user/?filter={"groups__name__in":["some","other"]}')
+        self.assertEqual(data['objects'], [self.user.id])
+
+class CursorPaginationTest(TestBase):
+    def test_1_walk(self):
+        from django.contrib.auth.models import Group
+        for i in range(3):
+            Group.objects.create(name="group-%s" % i)
+        expected = list(Group.objects.order_by('-name', 'pk').values_list('pk', flat=True))
+        path = '/api/v2/auth/group/?limit=2&order_by=-name'
+        found = []
+        while path:
+            data = self.get_json(path)
+            self.assertNotIn('total_count', data['meta'])
+            found += data['objects']
+            path = data['meta']['next']
+        self.assertEqual(found, expected)
+
+    def test_2_total_count(self):
+        data = self.get_json('/api/v2/auth/group/?limit=1&total_count=1')
+        self.assertEqual(data['meta']['total_count'], 2)
+        self.get_json('/api/v2/auth/group/?cursor=xxx', status_code=400)
+
+    def test_3_null_values(self):
+        from django.contrib.auth.models import User
+        from django.http import QueryDict
+        from django.utils import timezone
+        from tastycake.paginator import CursorPaginator
+        now = timezone.now()
+        for i in range(5):
+            User.objects.create(username="user-%s" % i, last_login=now - timezone.timedelta(days=i % 2) if i % 3 else None)
+        users = list(User.objects.all())
+        # NULL follows any value, so it goes last ascending and first descending, the primary key breaks ties
+        keys = {
+            'last_login': lambda u: (u.last_login is None, u.last_login, u.pk),
+            '-last_login': lambda u: (u.last_login is not None, u.last_login and (now - u.last_login), u.pk),
+        }
+        for order, key in sorted(keys.items()):
+            expected = [u.pk for u in sorted(users, key=key)]
+            found, cursor = [], ''
+            while cursor is not None:
+                paginator = CursorPaginator(
+                    QueryDict('limit=2&cursor=%s' % cursor), User.objects.order_by(order).values_list('pk', flat=True),
+                    resource_uri='/users/', limit=20, max_limit=0,
+                )
+                data = paginator.page()
+                found += data['objects']
+                cursor = data['meta']['next_cursor']
+            self.assertEqual(found, expected, order)
+
+class CountStrategyTest(TestBase):
+    def page(self, **attrs):
+        from django.contrib.auth.models import Group
+        from django.http import QueryDict
+        from tastycake.paginator import Paginator
+        paginator_class = type(str('TestPaginator'), (Paginator,), attrs)
+        paginator = paginator_class(QueryDict('limit=1'), Group.objects.order_by('pk'), resource_uri='/groups/', limit=20, max_limit=0)
+        return paginator.page()
+
+    def test_1_strategies(self):
+        data = self.page()
+        self.assertEqual(data['meta']['total_count'], 2)
+        self.assertNotIn('total_count_exact', data['meta'])
+        data = self.page(count_strategy='none')
+        self.assertEqual(data['meta']['total_count'], None)
+        self.assertEqual(data['meta']['total_count_exact'], False)
+        self.assertTrue(data['meta']['next'])
+        self.assertEqual(len(data['objects']), 1)
+        data = self.page(count_strategy='capped', count_cap=1)
+        self.assertEqual(data['meta']['total_count'], 1)
+        self.assertEqual(data['meta']['total_count_exact'], False)
+        data = self.page(count_strategy='estimate')
+        self.assertEqual(data['meta']['total_count'], 2)
+
+    def test_2_cached(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.page(count_cache_timeout=60)
+        with self.assertNumQueries(0):
+            data = self.page(count_cache_timeout=60)
+        self.assertEqual(data['meta']['total_count'], 2)
+
+class StreamingListTest(TestBase):
+    def test_1_stream(self):
+        from django.contrib.auth.models import Group
+        response = self.client.get('/api/v1/auth/group/?limit=0&order_by=-name')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        data = json.loads(b''.join(response.streaming_content).decode('utf-8'))
+        self.assertEqual(data['objects'], list(Group.objects.order_by('-name').values_list('pk', flat=True)))
+        self.assertEqual(data['meta']['total_count'], 2)
+
+    def test_2_not_streamed_page(self):
+        response = self.client.get('/api/v1/auth/group/?limit=1')
+        self.assertFalse(response.streaming)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(len(data['objects']), 1)
+
+class BulkDetailTest(TestBase):
+    def test_1_get(self):
+        with self.assertNumQueries(3):
+            # session, user and objects
+            data = self.get_json('/api/v1/auth/group/set/%s;999;%s/' % (self.other_group.id, self.group.id))
+        self.assertEqual([o.get('name') for o in data['objects']], ['other', None, 'some'])
+        self.assertEqual(data['objects'][1], {'pk': 999, 'error': 'NotFound'})
+
+    def test_2_post(self):
+        response = self.client.post('/api/v1/auth/group/set/', content_type='application/json', data=json.dumps([self.group.id]))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['objects'][0]['name'], 'some')
+        self.get_json('/api/v1/auth/group/set/x;y/', status_code=400)
+
+class QueryPlanTest(TestBase):
+    def test_1_plan(self):
+        plan = self.get_resource('v2', 'someapp', 'somechild').get_query_plan()
+        self.assertEqual(plan['select_related'], ['parent'])
+        self.assertEqual(plan['only'], None)
+        plan = self.get_resource('v2', 'auth', 'user').get_query_plan()
+        self.assertNotIn('password', plan['only'])
+        self.assertIn('username', plan['only'])
+
+    def test_2_query_count(self):
+        from django.test.utils import override_settings
+        from someapp.models import SomeObject, SomeChild
+        parent = SomeObject.objects.create(editor_group=self.group, name="parent")
+        children = [SomeChild.objects.create(parent=parent, name="child-%s" % i) for i in range(5)]
+        with override_settings(TASTYCAKE_COUNT_QUERIES=True):
+            response = self.client.get('/api/v2/someapp/somechild/set/%s/' % ';'.join(str(c.id) for c in children))
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.content.decode('utf-8'))
+            self.assertEqual([o['parent_name'] for o in data['objects']], ['parent'] * 5)
+            with_all = int(response['X-Query-Count'])
+            response = self.client.get('/api/v2/someapp/somechild/set/%s/' % children[0].id)
+            self.assertEqual(int(response['X-Query-Count']), with_all)
+
+class SparseFieldsTest(TestBase):
+    def test_1_fields(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_json('/api/v1/auth/user/%s/?fields=username,email' % self.user.id)
+        self.assertEqual(data, {'username': 'test', 'email': ''})
+        # the session user is loaded with all columns, the requested one is not
+        self.assertTrue([q for q in queries if '"auth_user"."email"' in q['sql'] and not 'password' in q['sql']])
+
+    def test_2_exclude_fields(self):
+        data = self.get_json('/api/v1/auth/user/%s/?exclude_fields=password' % self.user.id)
+        self.assertNotIn('password', data)
+        self.assertIn('username', data)
+        self.get_json('/api/v1/auth/user/%s/?fields=unknown' % self.user.id, status_code=400)
+        self.get_json('/api/v2/auth/user/%s/?fields=password' % self.user.id, status_code=400)
+
+class RelationMethodTest(TestBase):
+    def post_json(self, path, data):
+        return self.client.post(path, content_type='application/json', data=json.dumps(data))
+
+    def test_1_batched(self):
+        from django.contrib.auth.models import User
+        from django.test.utils import override_settings
+        users = [User.objects.create(username="user-%s" % i) for i in range(5)]
+        path = '/api/v2/auth/group/%s/user/add/' % self.other_group.id
+        with override_settings(TASTYCAKE_COUNT_QUERIES=True):
+            response = self.post_json(path, [users[0].id])
+            self.assertEqual(response.status_code, 204)
+            one = int(response['X-Query-Count'])
+            response = self.post_json(path, [u.id for u in users[1:]])
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(int(response['X-Query-Count']), one)
+        self.assertEqual(self.other_group.user_set.count(), 5)
+
+    def test_2_missing(self):
+        response = self.post_json('/api/v2/auth/group/%s/user/add/' % self.other_group.id, [self.user.id, 999])
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('999', json.loads(response.content.decode('utf-8'))['description'])
+        self.assertEqual(self.other_group.user_set.count(), 0)
+
+    def test_3_reverse_one_to_one(self):
+        from someapp.models import SomeObject, SomeLabel
+        obj = SomeObject.objects.create(name='object', editor_group=self.group)
+        first = SomeLabel.objects.create(name='first', target=obj)
+        second = SomeLabel.objects.create(name='second')
+        response = self.post_json('/api/v2/someapp/someobject/%s/label/set/' % obj.id, second.id)
+        self.assertEqual(response.status_code, 204, response.content)
+        self.assertIsNone(SomeLabel.objects.get(pk=first.pk).target_id)
+        self.assertEqual(SomeLabel.objects.get(pk=second.pk).target_id, obj.id)
+        response = self.post_json('/api/v2/someapp/someobject/%s/label/set/' % obj.id, None)
+        self.assertEqual(response.status_code, 204, response.content)
+        self.assertFalse(SomeLabel.objects.filter(target=obj).exists())
+
+    def test_4_forward_many_to_many(self):
+        path = '/api/v2/auth/user/%s/groups/%%s/' % self.user.id
+        response = self.post_json(path % 'add', [self.other_group.id])
+        self.assertEqual(response.status_code, 204, response.content)
+        self.assertIn(self.other_group, self.user.groups.all())
+        response = self.post_json(path % 'remove', [self.other_group.id])
+        self.assertEqual(response.status_code, 204, response.content)
+        self.assertEqual(list(self.user.groups.all()), [self.group])
+
+class BulkAuthorizationTest(TestBase):
+    def check(self, authorization_class, access, expected):
+        from django.contrib.auth.models import Group
+        from django.test import RequestFactory
+        from tastypie.bundle import Bundle
+        from tastycake.authorization import BulkAuthorization
+        bundle = Bundle(request=RequestFactory().get('/'))
+        allowed = BulkAuthorization(authorization_class()).allowed_pks(Group.objects.all(), bundle, access)
+        self.assertEqual(allowed, set(g.pk for g in expected))
+
+    def test_1_set_based(self):
+        from tastypie.authorization import ReadOnlyAuthorization
+        with self.assertNumQueries(1):
+            self.check(ReadOnlyAuthorization, 'read', [self.group, self.other_group])
+        with self.assertNumQueries(0):
+            self.check(ReadOnlyAuthorization, 'update', [])
+
+    def test_2_per_object_fallback(self):
+        from tastypie.authorization import Authorization
+        from tastypie.exceptions import Unauthorized
+
+        class DetailAuthorization(Authorization):
+            def read_detail(self, object_list, bundle):
+                if bundle.obj.name == 'other':
+                    raise Unauthorized()
+                return True
+
+        self.check(DetailAuthorization, 'read', [self.group])
+        self.check(DetailAuthorization, 'update', [self.group, self.other_group])
+
+    def test_3_authorized_known(self):
+        from django.contrib.auth.models import Group
+        from django.test import RequestFactory
+        from tastypie.authorization import ReadOnlyAuthorization
+        from tastypie.bundle import Bundle
+        from tastycake.authorization import BulkAuthorization
+        bundle = Bundle(request=RequestFactory().get('/'))
+        authorization = BulkAuthorization(ReadOnlyAuthorization())
+        base = Group.objects.all()
+        authorized = (base, base.filter(name='some'))
+        objects = [self.group, self.other_group]
+        with self.assertNumQueries(1):
+            allowed = authorization.allowed_pks(base.filter(pk__in=[g.pk for g in objects]), bundle, 'read', objects, authorized)
+        self.assertEqual(allowed, set([self.group.pk]))
+        with self.assertNumQueries(0):
+            allowed = authorization.allowed_pks(base.filter(name='other'), bundle, 'read', [self.other_group], (base, base))
+        self.assertEqual(allowed, set([self.other_group.pk]))
+        self.assertEqual(authorization.allowed_pks(base, bundle, 'read', authorized=(base, None)), set())
+
+class RequestAuthorizationCacheTest(TestBase):
+    def test_1_cached(self):
+        import mock
+        from django.test import RequestFactory
+        resource = self.get_resource('v1', 'auth', 'group')
+        request = RequestFactory().get('/')
+        request.user = self.user
+
+        def read_list(object_list, bundle):
+            return object_list.filter(name='some')
+
+        with mock.patch.object(resource._meta.authorization, 'read_list', side_effect=read_list) as method:
+            with self.assertNumQueries(1):
+                allowed = resource.get_allowed_pks(request, 'read', [self.group, self.other_group])
+            self.assertEqual(allowed, set([self.group.pk]))
+            with self.assertNumQueries(0):
+                allowed = resource.get_allowed_pks(request, 'read', [self.other_group, self.group])
+            self.assertEqual(allowed, set([self.group.pk]))
+            self.assertEqual(method.call_count, 1)
+
+class BulkOperationTest(TestBase):
+    def post_bulk(self, operations, status_code=200, version='v2'):
+        response = self.client.post('/api/%s/auth/group/bulk/' % version, content_type='application/json', data=json.dumps(operations))
+        self.assertEqual(response.status_code, status_code, response.content)
+        return json.loads(response.content.decode('utf-8'))['objects']
+
+    def test_1_create_update(self):
+        from django.contrib.auth.models import Group
+        results = self.post_bulk([
+            {'op': 'create', 'data': {'name': 'new'}},
+            {'op': 'update', 'pk': self.group.id, 'data': {'name': 'renamed'}},
+        ])
+        self.assertEqual(results, [{'pk': Group.objects.get(name='new').id}, {'pk': self.group.id}])
+        self.assertEqual(Group.objects.get(id=self.group.id).name, 'renamed')
+
+    def test_2_delete(self):
+        from django.contrib.auth.models import Group
+        results = self.post_bulk([{'op': 'delete', 'pk': self.group.id}])
+        self.assertEqual(results, [{'pk': self.group.id}])
+        self.assertFalse(Group.objects.filter(id=self.group.id).exists())
+
+    def test_3_failed(self):
+        from django.contrib.auth.models import Group
+        results = self.post_bulk([
+            {'op': 'update', 'pk': 'x', 'data': {'name': 'renamed'}},
+            {'op': 'delete', 'pk': 999},
+            {'op': 'create', 'data': {'name': 'new'}},
+            {'op': 'move'},
+        ], status_code=400)
+        self.assertEqual([r.get('error', None) for r in results], ['BadRequest', 'NotFound', None, 'BadRequest'])
+        self.assertFalse(Group.objects.filter(name__in=['new', 'renamed']).exists())
+
+        # The default authorization is read only
+        results = self.post_bulk([{'op': 'delete', 'pk': self.group.id}], status_code=400, version='v1')
+        self.assertEqual(results, [{'pk': self.group.id, 'error': 'Unauthorized', 'description': results[0]['description']}])
+        self.assertTrue(Group.objects.filter(id=self.group.id).exists())
+
+    def test_4_max_batch(self):
+        response = self.client.post('/api/v2/auth/group/bulk/', content_type='application/json', data=json.dumps([{'op': 'delete', 'pk': i} for i in range(1001)]))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Too many objects', json.loads(response.content.decode('utf-8'))['description'])
+
+    def test_5_overridden_save(self):
+        from django.contrib.auth.models import Group, User
+        from tastycake.api import CakeModelResource
+        self.assertFalse(CakeModelResource.overrides_model_method(Group, 'save'))
+        # AbstractBaseUser overrides save
+        self.assertTrue(CakeModelResource.overrides_model_method(User, 'save'))
+        self.assertFalse(self.get_resource('v2', 'auth', 'user').can_save_bulk())
+        self.assertTrue(self.get_resource('v2', 'auth', 'group').can_save_bulk())
+
+class InlineRelationTest(TestBase):
+    def test_1_redirect(self):
+        response = self.client.get('/api/v1/auth/user/%s/groups/' % self.user.id)
+        self.assertEqual(response.status_code, 302)
+
+    def test_2_inline_list(self):
+        data = self.get_json('/api/v1/auth/user/%s/groups/?inline=1' % self.user.id)
+        self.assertEqual(data['objects'], [self.group.id])
+        data = self.get_json('/api/v1/auth/user/%s/groups/?inline=1&filter={"name":"other"}' % self.user.id)
+        self.assertEqual(data['objects'], [])
+
+    def test_3_inline_object(self):
+        from someapp.models import SomeObject, SomeChild
+        parent = SomeObject.objects.create(editor_group=self.group, name='parent')
+        child = SomeChild.objects.create(parent=parent, name='child')
+        data = self.get_json('/api/v1/someapp/somechild/%s/parent/?inline=1' % child.id)
+        self.assertEqual(data['name'], 'parent')
+
+    def test_4_inline_read_only(self):
+        from django.contrib.auth.models import Group
+        from someapp.models import SomeObject, SomeChild
+        parent = SomeObject.objects.create(editor_group=self.group, name='parent')
+        child = SomeChild.objects.create(parent=parent, name='child')
+        path = '/api/v2/someapp/somechild/%s/parent/?inline=1' % child.id
+        response = self.client.delete(path)
+        self.assertEqual(response.status_code, 405)
+        self.assertTrue(SomeObject.objects.filter(id=parent.id).exists())
+        response = self.client.put(path, content_type='application/json', data=json.dumps({'name': 'changed'}))
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(SomeObject.objects.get(id=parent.id).name, 'parent')
+        count = Group.objects.count()
+        response = self.client.post(
+            '/api/v2/auth/user/%s/groups/?inline=1' % self.user.id,
+            content_type='application/json', data=json.dumps({'name': 'new'})
+        )
+        self.assertEqual(response.status_code, 405)
+        self.assertEqual(Group.objects.count(), count)
+
+    def test_5_request_unchanged(self):
+        from django.test import RequestFactory
+        request = RequestFactory().get('/', {'filter': '{"name":"some"}'})
+        request.user = self.user
+        resource = self.get_resource('v1', 'auth', 'group')
+        response = resource.inline_filter_response(request, {'user': self.user.id})
+        self.assertEqual(json.loads(response.content.decode('utf-8'))['objects'], [self.group.id])
+        self.assertEqual(request.GET['filter'], '{"name":"some"}')
+
+class IncludeTest(TestBase):
+    def setUp(self):
+        super(IncludeTest, self).setUp()
+        from someapp.models import SomeObject, SomeChild
+        self.parent = SomeObject.objects.create(editor_group=self.group, name='parent')
+        self.child = SomeChild.objects.create(parent=self.parent, name='child')
+
+    def test_1_to_one(self):
+        with self.assertNumQueries(5):
+            # session, user, child, parent and group
+            data = self.get_json('/api/v1/someapp/somechild/%s/?include=parent.editor_group' % self.child.id)
+        self.assertEqual(data['name'], 'child')
+        self.assertEqual(data['included']['parent'][str(self.parent.id)]['name'], 'parent')
+        self.assertEqual(data['included']['parent.editor_group'][str(self.group.id)]['name'], 'some')
+
+    def test_2_to_many(self):
+        data = self.get_json('/api/v1/auth/group/set/%s;%s/?include=user,changeable_objects' % (self.group.id, self.other_group.id))
+        self.assertEqual(list(data['included']['user']), [str(self.user.id)])
+        self.assertEqual(list(data['included']['changeable_objects']), [str(self.parent.id)])
+
+    def test_3_limits(self):
+        self.get_json('/api/v1/someapp/somechild/%s/?include=parent.children.parent.editor_group' % self.child.id, status_code=400)
+        self.get_json('/api/v1/someapp/somechild/%s/?include=name' % self.child.id, status_code=400)
+        self.get_json('/api/v1/someapp/somechild/%s/?include=nothing' % self.child.id, status_code=400)
+
+class ResponseCacheTest(TestBase):
+    def test_1_detail(self):
+        from someapp.models import SomeObject
+        obj = SomeObject.objects.create(editor_group=self.group, name='first')
+        path = '/api/v2/someapp/someobject/%s/' % obj.id
+        self.assertEqual(self.get_json(path)['name'], 'first')
+        with self.assertNumQueries(2):
+            # session and user only
+            self.assertEqual(self.get_json(path)['name'], 'first')
+        obj.name = 'second'
+        obj.save()
+        self.assertEqual(self.get_json(path)['name'], 'second')
+
+    def test_2_list(self):
+        from someapp.models import SomeObject
+        obj = SomeObject.objects.create(editor_group=self.other_group, name='first')
+        path = '/api/v2/someapp/someobject/?filter={"viewer_groups":%s}' % self.group.id
+        self.assertEqual(self.get_json(path)['objects'], [])
+        obj.viewer_groups.add(self.group)
+        self.assertEqual(self.get_json(path)['objects'], [obj.id])
+
+    def test_3_not_cached(self):
+        with self.assertNumQueries(4):
+            self.get_json('/api/v2/someapp/somechild/')
+        with self.assertNumQueries(4):
+            self.get_json('/api/v2/someapp/somechild/')
+
+    def test_4_include_not_cached(self):
+        from someapp.models import SomeObject
+        obj = SomeObject.objects.create(editor_group=self.group, name='first')
+        path = '/api/v2/someapp/someobject/%s/?include=editor_group' % obj.id
+        data = self.get_json(path)
+        self.assertEqual(data['included']['editor_group'][str(self.group.id)]['name'], 'some')
+        self.group.name = 'renamed'
+        self.group.save()
+        data = self.get_json(path)
+        self.assertEqual(data['included']['editor_group'][str(self.group.id)]['name'], 'renamed')
+
+    def test_5_access_revoked(self):
+        from someapp.models import SomeObject
+        from django.contrib.auth.models import Permission
+        # Access rules do not restrict the superuser
+        self.user.is_superuser = False
+        self.user.save()
+        self.user.user_permissions.add(Permission.objects.get(codename='change_someobject'))
+        obj = SomeObject.objects.create(editor_group=self.group, name='first')
+        path = '/api/v2/someapp/someobject/'
+        self.assertEqual(self.get_json(path)['objects'], [obj.id])
+        self.assertEqual(self.get_json('%s%s/' % (path, obj.id))['name'], 'first')
+        self.user.groups.remove(self.group)
+        self.assertEqual(self.get_json(path)['objects'], [])
+        self.assertEqual(self.client.get('%s%s/' % (path, obj.id)).status_code, 401)
+
+class ConditionalGetTest(TestBase):
+    def test_1_content_etag(self):
+        response = self.client.get('/api/v1/auth/group/')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/v1/auth/group/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_2_last_modified(self):
+        from django.utils import timezone
+        from someapp.models import SomeLabel
+        label = SomeLabel.objects.create(name='first')
+        # The HTTP date resolution is a second
+        SomeLabel.objects.filter(pk=label.pk).update(modified=timezone.now() - timezone.timedelta(seconds=10))
+        path = '/api/v2/someapp/somelabel/%s/' % label.id
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # The auto_now field is updated by the save
+        label.name = 'second'
+        label.save()
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(path, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_3_last_modified_explicit(self):
+        # Models without the last_modified option are validated by the content digest only
+        path = '/api/v2/auth/user/%s/' % self.user.id
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        self.user.email = 'test@example.com'
+        self.user.save()
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+class FastSerializerTest(TestCase):
+    def test_1_same_as_original(self):
+        import json
+        import datetime
+        import decimal
+        from django.utils import timezone
+        from django.utils.translation import ugettext_lazy
+        from tastypie.bundle import Bundle
+        from tastycake.api import Serializer, FastSerializer
+
+        data = {
+            'meta': {'limit': 20, 'next': None, 'ratio': 0.5, 'exact': True},
+            'objects': [1, 2, 3],
+            'details': [Bundle(data={
+                'name': 'some',
+                'verbose_name': ugettext_lazy('Name'),
+                'date_joined': timezone.now(),
+                'birthday': datetime.date(2017, 11, 11),
+                'alarm': datetime.time(11, 11, 11),
+                'amount': decimal.Decimal('1.10'),
+            })],
+        }
+        # The stdlib json backend flattening the payload is always available
+        class JsonSerializer(FastSerializer):
+            json_backends = ('json',)
+
+        self.assertEqual(JsonSerializer().json_backend, 'json')
+        for serializer in (FastSerializer(), JsonSerializer()):
+            self.assertEqual(json.loads(serializer.serialize(data)), json.loads(Serializer().serialize(data)))
+            self.assertEqual(serializer.serialize(data['objects']), '[1, 2, 3]' if serializer.json_backend == 'json' else '[1,2,3]')
+            callback = serializer.serialize(data, 'text/javascript', {'callback': 'callback'})
+            self.assertTrue(callback.startswith('callback('))
+            self.assertEqual(json.loads(callback[len('callback('):-1]), json.loads(Serializer().serialize(data)))
+
+class DatetimeFormatterTest(TestCase):
+    def test_1_settings(self):
+        import datetime
+        from django.test import override_settings
+        from django.utils import timezone
+        from tastycake.api import Serializer
+
+        serializer = Serializer()
+        value = datetime.datetime(2017, 11, 11, 11, 11, 11, 111, tzinfo=timezone.utc)
+        formatter = serializer.get_datetime_formatter()
+        self.assertEqual(serializer.format_datetime(value), '2017-11-11T11:11:11.000111+00:00')
+        self.assertIs(serializer.get_datetime_formatter(), formatter)
+        with override_settings(TASTYCAKE_USE_TZ='Europe/Moscow'):
+            # The value is converted to the naive current time
+            self.assertEqual(serializer.format_datetime(value), '2017-11-11T11:11:11.000111')
+            self.assertEqual(serializer.get_datetime_formatter().format_many([value, value]), ['2017-11-11T11:11:11.000111'] * 2)
+        self.assertEqual(serializer.format_datetime(value), '2017-11-11T11:11:11.000111+00:00')
+        self.assertEqual(Serializer(datetime_formatting='iso-8601-strict').format_datetime(value), '2017-11-11T11:11:11+00:00')
+
+class LazyResourceTest(TestBase):
+    def test_1_build_on_request(self):
+        from tastycake.api import Api
+        api = Api(settings_local={'v9': {'lazy': True, 'warm_up': ['auth.group']}})
+        model_resources = api.version_resources['v9'].application_resources['auth'].model_resources
+        self.assertIn('user', model_resources)
+        self.assertFalse(model_resources.is_loaded('user'))
+        self.assertTrue(model_resources.is_loaded('group'))
+        self.assertIs(model_resources['user'], model_resources['user'])
+        self.assertTrue(model_resources.is_loaded('user'))
+        self.assertEqual(
+            sorted(r._meta.resource_name for r in api.warm_up(['v9.auth'])),
+            sorted('auth/%s' % m for m in model_resources)
+        )
+
+    def test_2_dispatch(self):
+        data = self.get_json('/api/v3/auth/user/')
+        self.assertEqual(data['meta']['total_count'], 1)
+        self.assertEqual(data['objects'], [self.user.id])
+        data = self.get_json('/api/v3/auth/user/%s/' % self.user.id)
+        self.assertEqual(data['username'], 'test')
+        self.assertNotIn('password', data)
+        data = self.get_json('/api/v3/auth/user/schema/')
+        self.assertEqual(data['urls']['list_endpoint'], '/api/v3/auth/user/')
+        data = self.get_json('/api/v3/auth/')
+        self.assertIn('user', data['models'])
+        self.get_json('/api/v3/auth/nothing/', status_code=404)
+        self.get_json('/api/v3/auth/user/%s/nothing/' % self.user.id, status_code=400)
+
+    def test_3_warm_up_command(self):
+        from django.core.management import call_command
+        from django.utils.six import StringIO
+        out = StringIO()
+        call_command('tastycake_warmup', 'v3.auth.user', stdout=out)
+        self.assertIn('1 resources built', out.getvalue())
+
+    def test_4_warm_up_all(self):
+        from django.core.management import call_command
+        from django.utils.six import StringIO
+        from tastycake.api import Api
+        api = Api(settings_local={'v9': {'lazy': True}})
+        model_resources = api.version_resources['v9'].application_resources['auth'].model_resources
+        built = api.warm_up()
+        self.assertIn('auth/user', [r._meta.resource_name for r in built])
+        self.assertTrue(all(model_resources.is_loaded(m) for m in model_resources))
+        out = StringIO()
+        call_command('tastycake_warmup', stdout=out)
+        self.assertIn('resources built', out.getvalue())
+
+class DispatcherTest(TestBase):
+    def test_1_route_as_urls(self):
+        from django.urls import RegexURLResolver, Resolver404
+        resource = self.get_resource('v1', 'auth', 'user')
+        resolver = RegexURLResolver(r'^', resource.urls)
+        paths = [
+            '', 'schema', 'schema/', 'set', 'set/', 'set/1;2', 'set/1;2/', 'bulk', 'bulk/',
+            'find', 'find/', '1', '1/', 'abc/', '1/groups', '1/groups/', 'schema/x/',
+            '1/groups/add/', '1/2/groups/add', 'set/1/2/',
+        ]
+        for path in paths:
+            try:
+                match = resolver.resolve('auth/user/%s' % path)
+                kwargs = dict(match.kwargs)
+                kwargs.pop('resource_name')
+                expected = (match.url_name[len('api_'):], kwargs)
+            except Resolver404:
+                expected = None
+            self.assertEqual(resource.route(path), expected, path)
+
+    def test_2_dispatch(self):
+        from tastycake_example.apiurls import api
+        version = api.version_resources['v3']
+        self.assertIsNone(version.route('nothing/user/'))
+        self.assertIsNone(version.route('auth/user'))
+        view, kwargs = version.route('auth/user/1/groups/')
+        self.assertEqual(kwargs, {'resource_name': 'auth/user', 'pk': '1', 'method': 'groups'})
+        data = self.get_json('/api/v3/auth/group/set/%s;%s/' % (self.other_group.id, self.group.id))
+        self.assertEqual([o['name'] for o in data['objects']], ['other', 'some'])
+        response = self.client.get('/api/v3/auth/user/%s/groups/' % self.user.id)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/api/v3/auth/group/?'))
+
+class ModelSettingsTest(TestBase):
+    def test_1_frozen(self):
+        from django.conf import settings
+        from tastycake_example.apiurls import api
+        application = api.version_resources['v2'].application_resources['auth']
+        model_settings = application.get_model_settings('user')
+        self.assertIs(application.get_model_settings('user'), model_settings)
+        self.assertEqual(model_settings['exclude'], frozenset(['password']))
+        self.assertNotIn('last_modified', model_settings)
+        with self.assertRaises(TypeError):
+            model_settings['exclude'] = []
+        application.get_authentication(type(self.user))
+        application.get_authorization(type(self.user))
+        self.assertEqual(application.get_model_settings('user')['exclude'], frozenset(['password']))
+        self.assertNotIn('user', settings.TASTYCAKE['v2']['apps']['auth']['models'])
+
+class HookTest(TestBase):
+    def test_1_resolved_once(self):
+        from someapp.api import somechild_dehydrate
+        resource = self.get_resource('v2', 'someapp', 'somechild')
+        hooks = resource.get_hooks()
+        self.assertIs(resource.get_hook('dehydrate'), somechild_dehydrate)
+        self.assertIsNone(resource.get_hook('hydrate'))
+        self.assertIs(resource.get_hooks(), hooks)
+        resource = self.get_resource('v2', 'contenttypes', 'contenttype')
+        self.assertTrue(resource.get_hook('classmethods', 'find_by_url'))
+        self.assertIsNone(resource.get_hook('methods', 'nothing'))
+
+    def test_2_reload(self):
+        from django.test import override_settings
+        resource = self.get_resource('v2', 'someapp', 'somechild')
+        with override_settings(TASTYCAKE_RELOAD_HOOKS=True):
+            hooks = resource.get_hooks()
+            self.assertIsNot(resource.get_hooks(), hooks)
+        hooks = resource.get_hooks()
+        self.assertIs(resource.get_hooks(), hooks)
+
+    def test_3_check(self):
+        from django.test import override_settings
+        from tastycake.checks import check_configuration
+        self.assertEqual(check_configuration(), [])
+        with override_settings(TASTYCAKE={'v1': {'apps': {'auth': {'models': {'user': {
+            'dehydrate': 'someapp.api.nothing',
+            'methods': {'url': 'nothing.url'},
+        }}}}}}):
+            errors = check_configuration()
+        self.assertEqual(sorted(e.id for e in errors), ['tastycake.E001'] * 2)
+        self.assertIn('v1.auth.user.dehydrate', ' '.join(e.msg for e in errors))
+
+class ConfigurationTest(TestBase):
+    def test_1_check(self):
+        from tastycake.config import check_settings
+        messages = check_settings({
+            'v1': {
+                'authorization': 'someapp.api.nothing',
+                'exclude': ['nothing', 'auth.nothing', 'auth.user.nothing', 'auth.user.password'],
+                'apps': {
+                    'auth': {
+                        'pagnation': 'cursor',
+                        'models': {
+                            'user': {'exclude': ['password', 'nothing'], 'methods': {'url': 'someapp.api.contenttype_url'}},
+                            'nothing': {},
+                        },
+                    },
+                    'someapp': {'models': []},
+                },
+            },
+        })
+        self.assertEqual(sorted((m.id, m.msg) for m in messages), [
+            ('tastycake.E002', "Bad reference in v1.authorization: No function implementation: someapp.api.nothing"),
+            ('tastycake.E003', "v1.someapp.models should be a dictionary"),
+            ('tastycake.W001', "Unknown setting v1.auth.pagnation"),
+            ('tastycake.W002', "v1 refers to the unknown application: nothing"),
+            ('tastycake.W002', "v1 refers to the unknown field: auth.user.nothing"),
+            ('tastycake.W002', "v1 refers to the unknown model: auth.nothing"),
+            ('tastycake.W002', "v1.auth.models refers to the unknown model: auth.nothing"),
+            ('tastycake.W002', "v1.auth.user refers to the unknown field: auth.user.nothing"),
+        ])
+
+    def test_2_compiled(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from tastycake.api import Api
+        from someapp.api import authorization
+        resource = self.get_resource('v2', 'auth', 'user')
+        self.assertIs(resource.app_api.version_api.settings['authorization'], authorization)
+        self.assertEqual(resource.get_option('max_batch'), 500)
+        self.assertIsNone(resource.get_option('last_modified'))
+        self.assertEqual(self.get_resource('v2', 'someapp', 'somelabel').get_option('last_modified'), 'modified')
+        self.assertIs(resource.get_options(), resource.get_options())
+        with self.assertRaises(ImproperlyConfigured):
+            Api(settings_local={'v9': {'authorization': 'someapp.api.nothing'}})
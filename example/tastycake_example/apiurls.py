@@ -2,6 +2,8 @@ from django.conf.urls import include, url
 from django.conf import settings
 from tastycake.api import Api
 
+api = Api()
+
 urlpatterns = [
-    url(r'', include(Api().urls)),
+    url(r'', include(api.urls)),
 ]
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'access_tastypie',
     'tastycake',
     'someapp',
+    'accessprofile',
 ]
 
 MIDDLEWARE = [
@@ -142,9 +143,32 @@ TASTYCAKE = {
         'description': 'The customized and extended version',
         'authorization': 'someapp.api.authorization',
         'authentication': 'someapp.api.authentication',
+        'max_batch': 500,
         'apps': {
             'someapp': {
                 'verbose_name': _("Some Application"),
+                'models': {
+                    'someobject': {
+                        'response_cache_timeout': 60,
+                        # Access rules refer to groups of the current user
+                        'response_cache_depends': ['auth.user', 'auth.group', 'auth.User_groups'],
+                    },
+                    'somelabel': {
+                        # Saving the label updates the auto_now field
+                        'last_modified': 'modified',
+                    },
+                    'somechild': {
+                        'dehydrate': 'someapp.api.somechild_dehydrate',
+                        'depends': ['parent'],
+                    },
+                },
+            },
+            'auth': {
+                'models': {
+                    'group': {
+                        'pagination': 'cursor',
+                    },
+                },
             },
             'contenttypes': {
                 'models': {
@@ -169,7 +193,18 @@ TASTYCAKE = {
             'tastypie.apikey',
             'auth.user.password',
         }
-    }
+    },
+    'v3': {
+        'name': 'lazy',
+        'description': 'The version building model resources on the first request',
+        'lazy': True,
+        'warm_up': ['auth.group'],
+        'exclude': {
+            'sessions',
+            'tastypie.apikey',
+            'auth.user.password',
+        }
+    },
 }
 
 # Logging options
@@ -1,17 +1,25 @@
 from __future__ import unicode_literals
 
 from django.conf.urls import url, include
-from django.http import HttpResponse, Http404, HttpResponseRedirect
+from django.http import HttpResponse, Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.apps import apps
 
-from django.db.models import Q, F
+from django.db import transaction, connections, router
+from django.db.models import signals
+from django.db.models import Q, F, Model
 from django.db.models.fields.related import ForeignKey, ManyToManyField, OneToOneField
 from django.db.models.fields.reverse_related import ForeignObjectRel, OneToOneRel, ManyToOneRel, ManyToManyRel
 
 from django.utils.translation import ugettext_lazy as _, get_language
+from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned, ImproperlyConfigured
+from django.utils.encoding import force_text
+from django.utils import six
+from django.utils.http import http_date, parse_http_date_safe
 
 from django.conf import settings
+from django.core.signals import setting_changed
+from django.core.serializers.json import DjangoJSONEncoder
 
 from tastypie.exceptions import (
     TastypieError,
@@ -29,10 +37,11 @@ from tastypie.exceptions import (
 )
 
 from tastypie.serializers import Serializer as _Serializer
+from tastypie.bundle import Bundle
 from tastypie.utils.mime import determine_format, build_content_type
 from tastypie.utils import is_valid_jsonp_callback_value, string_to_python, trailing_slash
 from tastypie.api import Api as TastypieApi
-from tastypie.http import HttpNoContent
+from tastypie.http import HttpNoContent, HttpNotModified, HttpNotFound, HttpMultipleChoices
 from tastypie.resources import Resource, ModelResource
 from tastypie.constants import ALL,ALL_WITH_RELATIONS
 
@@ -43,37 +52,179 @@ from tastypie import fields
 
 import re
 import traceback
+import weakref
 import sys
 import copy
 import json
+import hashlib
+import calendar
+
+from collections import namedtuple
 
 import datetime
+import decimal
 from django.utils import timezone
 
 from urllib import urlencode
 
 from importlib import import_module
 
+from .utils import LRUCache, QueryCounter, LazyDict, request_cache, request_cached
+from .paginator import Paginator, CursorPaginator
+from .authorization import BulkAuthorization
+from .cache import ResponseCache
+from .config import FrozenSettings, get_sub_excludes, import_reference, check_settings, HOOKS, HOOK_GROUPS
+
 import logging
 logger = logging.getLogger(__name__)
 
 class TastycakeError(TastypieError):
     pass
 
+class DatetimeFormatter(object):
+    """
+    Formats datetimes accordingly to the datetime formatting and the `TASTYCAKE_USE_TZ` setting.
+
+    The formatting function and the time zone are resolved once, when the formatter is built,
+    instead of every formatted value. The `generation` is changed when any related setting
+    is changed, so the formatter built before is known to be outdated.
+    """
+    generation = 0
+    SETTINGS = ('TASTYCAKE_USE_TZ', 'TASTYPIE_DATETIME_FORMATTING', 'TIME_ZONE', 'USE_TZ')
+
+    def __init__(self, datetime_formatting):
+        self.generation = DatetimeFormatter.generation
+        tz = getattr(settings,"TASTYCAKE_USE_TZ", None)
+        if isinstance(tz,basestring):
+            tz = timezone.pytz.timezone(tz)
+        self.format = self.build_format(datetime_formatting, tz)
+
+    @staticmethod
+    def build_format(datetime_formatting, tz):
+        from tastypie.utils import format_datetime
+        if datetime_formatting == 'rfc-2822':
+            return format_datetime
+        # Remove microseconds to strictly adhere to iso-8601
+        strict = datetime_formatting == 'iso-8601-strict'
+        localtime, make_naive = timezone.localtime, timezone.make_naive
+
+        def format(value):
+            if strict:
+                value = value.replace(microsecond=0)
+            if tz:
+                value = make_naive(localtime(value, tz))
+            return value.isoformat()
+        return format
+
+    def format_many(self, values):
+        """
+        Returns the list of formatted values
+        """
+        return list(map(self.format, values))
+
+    def is_outdated(self):
+        return self.generation != DatetimeFormatter.generation
+
+    @classmethod
+    def setting_changed_receiver(cls, setting=None, **kwargs):
+        if setting in cls.SETTINGS:
+            cls.generation += 1
+
+setting_changed.connect(DatetimeFormatter.setting_changed_receiver)
+
 class Serializer(_Serializer):
+    def get_datetime_formatter(self):
+        """
+        Returns the DatetimeFormatter of the serializer, rebuilt when settings change
+        """
+        formatter = self.__dict__.get('_datetime_formatter', None)
+        if formatter is None or formatter.is_outdated():
+            formatter = self._datetime_formatter = DatetimeFormatter(self.datetime_formatting)
+        return formatter
+
     def format_datetime(self, value):
-        from tastypie.utils import format_datetime
-        if self.datetime_formatting == 'rfc-2822':
-            return format_datetime(value)
-        if self.datetime_formatting == 'iso-8601-strict':
-            # Remove microseconds to strictly adhere to iso-8601
-            value = value - datetime.timedelta(microseconds=value.microsecond)
-        tz = getattr(settings,"TASTYCAKE_USE_TZ", None)
-        if tz:
-            if isinstance(tz,basestring):
-                tz = timezone.pytz.timezone(tz)
-            value = timezone.make_naive(timezone.localtime(value,tz))
-        return value.isoformat()
+        return self.get_datetime_formatter().format(value)
+
+JSON_BACKENDS = ('orjson', 'ujson', 'json')
+
+def get_json_encoder(default, backends=JSON_BACKENDS):
+    """
+    Returns the name of the fastest JSON encoder available among backends: orjson,
+    ujson (a version supporting the default hook), or the standard json module,
+    and the function encoding data to JSON with sorted keys by this encoder.
+
+    The default function is called for values not encoded natively.
+    """
+    if 'orjson' in backends:
+        try:
+            import orjson
+            option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+            return 'orjson', lambda data: orjson.dumps(data, default=default, option=option).decode('utf-8')
+        except ImportError:
+            pass
+    if 'ujson' in backends:
+        try:
+            import ujson
+            ujson.dumps(datetime.date.today(), default=force_text)
+            return 'ujson', lambda data: ujson.dumps(data, default=default, sort_keys=True, ensure_ascii=False, escape_forward_slashes=False)
+        except (ImportError, TypeError):
+            pass
+    return 'json', json.JSONEncoder(default=default, sort_keys=True, ensure_ascii=False).encode
+
+class FastSerializer(Serializer):
+    """
+    The serializer encoding JSON by the fastest encoder available.
+
+    The orjson and ujson encoders get the payload as is, while bundles, dates and times,
+    decimals, lazy translations and others are converted by the encoder default hook
+    the same way as `to_simple` does. The standard json module would call the Python-level
+    hook for every such value, so the payload is flattened once by `to_simple` before encoding,
+    common values being dispatched by their exact type.
+    """
+    json_backends = JSON_BACKENDS
+    NATIVE_TYPES = frozenset(six.integer_types + (float, bool, six.text_type, type(None)))
+
+    def __init__(self, *args, **kwargs):
+        super(FastSerializer,self).__init__(*args, **kwargs)
+        self.json_backend, self.encode_json = get_json_encoder(self.to_json_default, self.json_backends)
+
+    def to_json_default(self, value):
+        if isinstance(value, Bundle):
+            return value.data
+        if isinstance(value, datetime.datetime):
+            return self.format_datetime(value)
+        if isinstance(value, datetime.date):
+            return self.format_date(value)
+        if isinstance(value, datetime.time):
+            return self.format_time(value)
+        return force_text(value)
+
+    def to_simple(self, data, options):
+        data_type = type(data)
+        native = self.NATIVE_TYPES
+        if data_type in native:
+            return data
+        to_simple = self.to_simple
+        if data_type is Bundle:
+            data, data_type = data.data, dict
+        if data_type is dict:
+            return {key: val if type(val) in native else to_simple(val, options) for key, val in six.iteritems(data)}
+        if data_type is list or data_type is tuple:
+            return [item if type(item) in native else to_simple(item, options) for item in data]
+        if data_type is datetime.datetime:
+            return self.format_datetime(data)
+        if data_type is datetime.date:
+            return self.format_date(data)
+        if data_type is six.binary_type or data_type is decimal.Decimal:
+            return force_text(data)
+        return super(FastSerializer,self).to_simple(data, options)
+
+    def to_json(self, data, options=None):
+        if self.json_backend == 'json':
+            data = self.to_simple(data, options or {})
+        elif isinstance(data, Bundle):
+            data = data.data
+        return self.encode_json(data)
 
 class BaseApiMixin:
     @staticmethod
@@ -95,20 +246,10 @@ class BaseApiMixin:
 
     @staticmethod
     def _import_function(function_ref):
-        if callable(function_ref):
-            return function_ref
-        function_path = function_ref.rsplit('.',1)
-        if len(function_path) < 2:
-            raise TastycakeError("Bad function reference: %s" % function_ref)
         try:
-            module = import_module(function_path[0])
-        except ImportError, ex:
-            raise TastycakeError("Bad function module: %s" % ex)
-
-        function_callable = getattr(module, function_path[1], None)
-        if not function_callable:
-            raise TastycakeError("No function implementation: %s" % function_ref)
-        return function_callable
+            return import_reference(function_ref)
+        except ImproperlyConfigured, ex:
+            raise TastycakeError("%s" % ex)
 
     @staticmethod
     def _check_method(request,methods):
@@ -126,6 +267,14 @@ class BaseApiMixin:
     def wrap_function(self, view_func):
         @csrf_exempt
         def wrapper(request, *args, **kwargs):
+            if getattr(settings, "TASTYCAKE_COUNT_QUERIES", False):
+                with QueryCounter() as counter:
+                    ret = call(request, *args, **kwargs)
+                ret['X-Query-Count'] = str(counter.count)
+                return ret
+            return call(request, *args, **kwargs)
+
+        def call(request, *args, **kwargs):
             try:
                 return self.create_response(request, view_func(request, *args, **kwargs), *args, **kwargs)
             except ImmediateHttpResponse as ex:
@@ -162,15 +311,13 @@ class BaseApiMixin:
                 ret.status_code = 500
                 return ret
         return wrapper
-    def create_response(self, request, data, response_class=HttpResponse, *args, **kwargs):
-        if isinstance(data, HttpResponse):
-            return data
+    def get_serializer(self):
         if hasattr(self, '_meta'):
-            serializer = self._meta.serializer
-        else:
-            serializer = self.serializer
-        desired_format = determine_format(request, serializer)
+            return self._meta.serializer
+        return self.serializer
 
+    @staticmethod
+    def _get_serialize_options(request, desired_format):
         options = {}
         if 'text/javascript' in desired_format:
             callback = request.GET.get('callback', 'callback')
@@ -179,12 +326,85 @@ class BaseApiMixin:
                 raise BadRequest('JSONP callback name is invalid.')
 
             options['callback'] = callback
+        return options
+
+    def create_response(self, request, data, response_class=HttpResponse, *args, **kwargs):
+        if isinstance(data, (HttpResponse, StreamingHttpResponse)):
+            return data
+        serializer = self.get_serializer()
+        desired_format = determine_format(request, serializer)
+        options = self._get_serialize_options(request, desired_format)
 
         serialized = "{}"
         if data:
             serialized = serializer.serialize(data, desired_format, options)
         return response_class(content=serialized, content_type=build_content_type(desired_format))
 
+    @staticmethod
+    def _etag_matches(request, etag):
+        header = request.META.get('HTTP_IF_NONE_MATCH', None)
+        if not header:
+            return False
+        if header.strip() == '*':
+            return True
+        return any(t.strip() in (etag, 'W/' + etag) for t in header.split(','))
+
+    @classmethod
+    def _is_not_modified(cls, request, etag=None, last_modified=None):
+        """
+        Returns True if the copy of the client is still valid accordingly to the If-None-Match,
+        or (if absent) If-Modified-Since header. The last_modified is a timestamp.
+        """
+        if request.META.get('HTTP_IF_NONE_MATCH', None):
+            return etag is not None and cls._etag_matches(request, etag)
+        since = request.META.get('HTTP_IF_MODIFIED_SINCE', None)
+        if since and last_modified is not None:
+            since = parse_http_date_safe(since)
+            return since is not None and last_modified <= since
+        return False
+
+    def get_cached_schema(self, key, build):
+        """
+        Returns the schema cache entry for the key, building it on the first call.
+
+        Verbose names and descriptions are lazy translations, so the entry is kept
+        per active language. The entry contains the schema data itself, the digest
+        used to build an ETag, and already serialized content per format.
+        """
+        cache = self.__dict__.setdefault('_schema_cache', {})
+        key = (get_language(),) + tuple(key)
+        entry = cache.get(key, None)
+        if entry is None:
+            data = build()
+            digest = hashlib.md5(json.dumps(data, sort_keys=True, default=force_text).encode('utf-8')).hexdigest()
+            entry = cache[key] = {'data': data, 'digest': digest, 'content': {}}
+        return entry
+
+    def create_schema_response(self, request, key, build, *args, **kwargs):
+        entry = self.get_cached_schema(key, build)
+        serializer = self.get_serializer()
+        desired_format = determine_format(request, serializer)
+        options = self._get_serialize_options(request, desired_format)
+        etag = '"%s"' % hashlib.md5(('%s:%s:%s' % (entry['digest'], desired_format, options.get('callback', ''))).encode('utf-8')).hexdigest()
+        if self._etag_matches(request, etag):
+            ret = HttpNotModified()
+            ret['ETag'] = etag
+            return ret
+
+        if options:
+            # JSONP content depends on the callback name, never cache it
+            serialized = serializer.serialize(entry['data'], desired_format, options)
+        else:
+            serialized = entry['content'].get(desired_format, None)
+            if serialized is None:
+                serialized = entry['content'][desired_format] = serializer.serialize(entry['data'], desired_format, options)
+        ret = HttpResponse(content=serialized, content_type=build_content_type(desired_format))
+        ret['ETag'] = etag
+        return ret
+
+    def invalidate_caches(self):
+        self._schema_cache = {}
+
 class BaseApi(BaseApiMixin, object):
     def __init__(self, serializer_class=Serializer):
         self.serializer_class=serializer_class
@@ -198,6 +418,8 @@ class BaseApi(BaseApiMixin, object):
         return self.prepend_urls()
 
 class Api(BaseApi):
+    instances = weakref.WeakSet()
+
     def __init__(self, settings_local=None, settings_name='TASTYCAKE', serializer_class=Serializer):
         super(Api,self).__init__(serializer_class=serializer_class)
         self.settings = {'v1':{}}
@@ -211,13 +433,20 @@ class Api(BaseApi):
             module = import_module(module)
             self.settings = getattr(module, name)
 
+        errors = [m for m in check_settings(self.settings) if m.is_serious()]
+        if errors:
+            raise ImproperlyConfigured("; ".join(e.msg for e in errors))
+
         self.version_resources = {}
 
         for v in self.settings:
             self.version_resources[v] = self.create_version_resource(v)
 
+        setting_changed.connect(self.setting_changed_receiver)
+        Api.instances.add(self)
+
     def create_version_resource(self, version):
-        return VersionApi(self, version, self.settings[version])
+        return VersionApi(self, version, self.settings[version], serializer_class=self.serializer_class)
 
     def prepend_urls(self):
         ret = [
@@ -227,18 +456,47 @@ class Api(BaseApi):
             ret.append(url('',include(self.version_resources[v].urls)))
         return ret + super(Api,self).prepend_urls()
 
-    def get_versions_view(self, request, *args, **kwargs):
-        return self.create_response(request, {
+    def build_schema(self):
+        return {
             v: self.version_resources[v].build_schema()
             for v in self.version_resources
-        }, *args, **kwargs)
+        }
+
+    def get_versions_view(self, request, *args, **kwargs):
+        return self.create_schema_response(request, ('versions',), self.build_schema, *args, **kwargs)
+
+    def invalidate_caches(self):
+        super(Api,self).invalidate_caches()
+        for v in self.version_resources:
+            self.version_resources[v].invalidate_caches()
+
+    def warm_up(self, names=None):
+        """
+        Builds model resources selected by names like `v1`, `v1.auth` or `v1.auth.user`,
+        or all model resources if names are not passed. Returns the list of built resources.
+        """
+        ret = []
+        for v in sorted(self.version_resources):
+            selected = None
+            if names is not None:
+                selected = [n.split('.',1)[1] if '.' in n else None for n in names if n.split('.')[0] == v]
+                if not selected:
+                    continue
+                if None in selected:
+                    selected = None
+            ret += self.version_resources[v].warm_up(selected)
+        return ret
+
+    def setting_changed_receiver(self, **kwargs):
+        self.invalidate_caches()
 
 class VersionApi(BaseApiMixin, TastypieApi):
     def __init__(self, api, version, settings, serializer_class=Serializer):
+        serializer_class = self._import_function(settings.get('serializer_class', serializer_class))
         super(VersionApi,self).__init__(api_name=version, serializer_class=serializer_class)
         self.api = api
         self.serializer_class = serializer_class
-        self.settings = settings
+        self.settings = FrozenSettings(settings)
         self.application_resources = {}
 
         self.default_authentication = SessionAuthentication()
@@ -246,11 +504,28 @@ class VersionApi(BaseApiMixin, TastypieApi):
 
         applications = set(
             [config.label for config in apps.get_app_configs() if list(config.get_models())]
-        ).difference(self.settings.get('exclude',set([])))
+        ).difference(self.settings['exclude'])
 
         for a in applications:
             self.application_resources[a] = self.create_application_resource(a)
-            self.application_resources[a].register_model_resources(self)
+            if not self.is_lazy():
+                self.application_resources[a].register_model_resources(self)
+
+        if self.is_lazy():
+            self.warm_up(self.settings.get('warm_up', []))
+
+    def is_lazy(self):
+        """
+        Lazy version builds model resources on the first request instead of the start
+        """
+        return bool(self.settings.get('lazy', False))
+
+    def uses_dispatcher(self):
+        """
+        The version using the dispatcher routes all requests by the single URL pattern
+        instead of URL patterns of all resources. The lazy version always uses the dispatcher.
+        """
+        return self.is_lazy() or bool(self.settings.get('dispatcher', False))
 
     def prepend_urls(self):
         return [
@@ -258,13 +533,74 @@ class VersionApi(BaseApiMixin, TastypieApi):
             for a in self.application_resources
         ]
 
+    @property
+    def urls(self):
+        if not self.uses_dispatcher():
+            return super(VersionApi,self).urls
+        return [
+            url(r"^(?P<api_name>%s)%s$" % (self.api_name, trailing_slash), self.wrap_view('top_level'), name="api_%s_top_level" % self.api_name),
+            url(r"^(?P<api_name>%s)/(?P<path>.+)$" % self.api_name, self.wrap_function(self.dispatch_path), name="api_%s_dispatch" % self.api_name),
+        ]
+
+    def route(self, path):
+        """
+        Returns the view and its keyword arguments for the path relative to the version URL,
+        or None if nothing matches.
+
+        The application and model are looked up by name, the rest of the path is routed by the model resource.
+        The model resource of the lazy version is built here on the first request.
+        """
+        application, slash, rest = path.partition('/')
+        app_resource = self.application_resources.get(application, None)
+        if app_resource is None:
+            return None
+        model, slash, rest = rest.partition('/')
+        if not model:
+            return (app_resource.get_schema_view, {'application': application}) if not slash else None
+        resource = app_resource.model_resources.get(model, None)
+        if resource is None or not slash:
+            return None
+        route = resource.route(rest)
+        if route is None:
+            return None
+        view_name, kwargs = route
+        kwargs['resource_name'] = resource._meta.resource_name
+        return resource.get_view(view_name), kwargs
+
+    def dispatch_path(self, request, api_name=None, path=None, **kwargs):
+        route = self.route(path)
+        if route is None:
+            raise NotFound("No such url: %s" % request.path)
+        view, kwargs = route
+        return view(request, api_name=api_name, **kwargs)
+
+    def warm_up(self, names=None):
+        """
+        Builds model resources selected by names like `auth` or `auth.user`,
+        or all model resources if names are not passed. Returns the list of built resources.
+        """
+        ret = []
+        for a in sorted(self.application_resources):
+            app_resource = self.application_resources[a]
+            models = None
+            if names is not None:
+                models = [n.split('.',1)[1] if '.' in n else None for n in names if n.split('.')[0] == a]
+                if not models:
+                    continue
+                if None in models:
+                    models = None
+            for m in sorted(app_resource.model_resources if models is None else models):
+                resource = app_resource.model_resources.get(m, None)
+                if resource is None:
+                    raise TastycakeError("No such resource to warm up: %s/%s" % (a, m))
+                ret.append(resource)
+        return ret
+
     def create_application_resource(self, application):
-        app_settings = copy.deepcopy(self.settings.get('apps',{}).get(application,{}))
-        app_settings['exclude'] = [
-            e.split('.',1)[1]
-            for e in self.settings.get('exclude',[])
-            if e.split('.')[0] == application and len(e.split('.')) >= 2
-        ] + app_settings.get('exclude',[])
+        app_settings = FrozenSettings(
+            copy.deepcopy(self.settings.get('apps',{}).get(application,{})),
+            exclude=get_sub_excludes(self.settings['exclude'], application)
+        )
         return ApplicationApi(self, self.api_name, application, app_settings, serializer_class=self.serializer_class)
 
     def build_schema(self, detailed=False):
@@ -282,7 +618,12 @@ class VersionApi(BaseApiMixin, TastypieApi):
         return ret
 
     def top_level(self, request, api_name=None, *args, **kwargs):
-        return self.create_response(request, self.build_schema(detailed=True), *args, **kwargs)
+        return self.create_schema_response(request, ('top_level',), lambda: self.build_schema(detailed=True), *args, **kwargs)
+
+    def invalidate_caches(self):
+        super(VersionApi,self).invalidate_caches()
+        for a in self.application_resources:
+            self.application_resources[a].invalidate_caches()
 
     def get_authentication(self, model):
         if not 'authentication' in self.settings:
@@ -303,11 +644,13 @@ class VersionApi(BaseApiMixin, TastypieApi):
 
 class ApplicationApi(BaseApi):
     def __init__(self, version_api, version, application, settings, serializer_class=Serializer):
+        serializer_class = self._import_function(settings.get('serializer_class', serializer_class))
         super(ApplicationApi,self).__init__(serializer_class=serializer_class)
         self.version_api = version_api
         self.version = version
         self.application = application
-        self.settings = settings
+        self.settings = FrozenSettings(settings)
+        self._model_settings = {}
 
         models = set(
             self.settings.get('models',{}).keys()
@@ -319,12 +662,12 @@ class ApplicationApi(BaseApi):
         except LookupError:
             pass
 
-        models = models.difference(self.settings.get('exclude',set([])))
+        models = models.difference(self.settings['exclude'])
 
         self.app_config = app_config
-        self.model_resources = {
-            m:self.create_model_resource(m) for m in models
-        }
+        self.model_resources = LazyDict(models, self.load_model_resource)
+        if not self.version_api.is_lazy():
+            self.model_resources.load()
 
     def prepend_urls(self):
         return [
@@ -359,21 +702,35 @@ class ApplicationApi(BaseApi):
         return ret
 
     def get_schema_view(self, request, application=None, *args, **kwargs):
-        return self.create_response(request, self.build_schema(details=True), *args, **kwargs)
+        return self.create_schema_response(request, ('application',), lambda: self.build_schema(details=True), *args, **kwargs)
+
+    def invalidate_caches(self):
+        super(ApplicationApi,self).invalidate_caches()
+        for resource in self.model_resources.loaded().values():
+            resource.invalidate_caches()
 
     def register_model_resources(self, version_api):
         for m in self.model_resources:
             version_api.register(self.model_resources[m])
 
     def get_model_settings(self, model_name):
-        model_settings = self.settings.get('models',{}).get(model_name,{})
-        model_settings['exclude'] = [
-            e.split('.',1)[1]
-            for e in self.settings.get('exclude',[])
-            if e.split('.')[0] == model_name and len(e.split('.')) >= 2
-        ] + model_settings.get('exclude',[])
+        """
+        Returns effective settings of the model, built once
+        """
+        model_settings = self._model_settings.get(model_name, None)
+        if model_settings is None:
+            model_settings = self._model_settings[model_name] = FrozenSettings(
+                self.settings.get('models',{}).get(model_name,{}),
+                exclude=get_sub_excludes(self.settings['exclude'], model_name)
+            )
         return model_settings
 
+    def load_model_resource(self, model_name):
+        resource = self.create_model_resource(model_name)
+        if self.version_api.is_lazy():
+            self.version_api.register(resource)
+        return resource
+
     def create_model_resource(self,model_name):
         model_class = None
         try:
@@ -394,11 +751,12 @@ class ApplicationApi(BaseApi):
                 object_class = model_class
                 queryset = object_class.objects.all()
                 resource_name = "%s/%s" % (self.application, model_class._meta.model_name)
-                excludes = model_settings.get('exclude',[])
+                excludes = list(model_settings['exclude'])
                 always_return_data = False
                 include_resource_uri = False
                 authentication = self.get_authentication(model_class)
                 authorization = self.get_authorization(model_class)
+                paginator_class = ModelResource.get_paginator_class()
                 max_limit = 0
 
         return ModelApi(self, self.version, self.application, model_class, model_settings)
@@ -430,13 +788,239 @@ class ApplicationApi(BaseApi):
 class ExpressionError(Exception):
     pass
 
+FieldPath = namedtuple('FieldPath', ['path', 'model', 'field', 'many'])
+
 class CakeModelResource(BaseApiMixin, ModelResource):
+    FIELD_PATH_CACHE_SIZE = 1024
+    FILTER_CACHE_SIZE = 256
+
     def __init__(self, app_api, version, application, model_class, settings):
         super(CakeModelResource,self).__init__()
         self.app_api = app_api
         self.version = version
         self.application = application
         self.settings = settings
+        self.field_path_cache = LRUCache(self.get_option('field_path_cache_size', self.FIELD_PATH_CACHE_SIZE))
+        self.filter_cache = LRUCache(self.get_option('filter_cache_size', self.FILTER_CACHE_SIZE))
+        self.reset_hooks()
+        self.get_hooks()
+
+    @classmethod
+    def get_options(cls):
+        """
+        Returns options of the model, application and version settings merged once,
+        the model settings overriding the application settings overriding the version settings
+        """
+        options = cls.__dict__.get('_options', None)
+        if options is None:
+            options = {}
+            for s in (cls._application.version_api.settings, cls._application.settings, cls._settings):
+                options.update(s or {})
+            cls._options = options
+        return options
+
+    @classmethod
+    def get_option(cls, name, default=None):
+        """
+        Returns the option looking through the model, application and version settings
+        """
+        return cls.get_options().get(name, default)
+
+    PAGINATORS = {
+        'offset': Paginator,
+        'cursor': CursorPaginator,
+    }
+
+    @classmethod
+    def get_paginator_class(cls):
+        pagination = cls.get_option('pagination', 'offset')
+        paginator_class = cls.PAGINATORS.get(pagination, None) or cls._import_function(pagination)
+
+        class ModelPaginator(paginator_class):
+            count_strategy = cls.get_option('count', getattr(paginator_class, 'count_strategy', 'exact'))
+            count_cap = cls.get_option('count_cap', getattr(paginator_class, 'count_cap', 1000))
+            count_cache = cls.get_option('count_cache', getattr(paginator_class, 'count_cache', 'default'))
+            count_cache_timeout = cls.get_option('count_cache_timeout', getattr(paginator_class, 'count_cache_timeout', 0))
+        return ModelPaginator
+
+    def invalidate_caches(self):
+        super(CakeModelResource,self).invalidate_caches()
+        self.field_path_cache.clear()
+        self.filter_cache.clear()
+        self._query_plan = None
+        self._response_cache = None
+        self.reset_hooks()
+
+    HOOKS = HOOKS
+    HOOK_GROUPS = HOOK_GROUPS
+
+    def resolve_hooks(self):
+        """
+        Returns callables of hooks referenced by the model settings
+        """
+        hooks = {
+            name: self._import_function(self.settings[name])
+            for name in self.HOOKS if self.settings.get(name, None)
+        }
+        for group in self.HOOK_GROUPS:
+            hooks[group] = {
+                name: self._import_function(ref)
+                for name, ref in self.settings.get(group, {}).items() if ref
+            }
+        return hooks
+
+    def reset_hooks(self):
+        """
+        Drops resolved hooks. They are resolved again on every call if the
+        `TASTYCAKE_RELOAD_HOOKS` setting is on, to see changed code while debugging.
+        """
+        self._hooks = None
+        self._reload_hooks = getattr(settings, 'TASTYCAKE_RELOAD_HOOKS', False)
+
+    def get_hooks(self):
+        if self._hooks is None or self._reload_hooks:
+            self._hooks = self.resolve_hooks()
+        return self._hooks
+
+    def get_hook(self, name, method=None):
+        """
+        Returns the hook callable by name, or the method callable of the hook group, or None if not set
+        """
+        hooks = self.get_hooks()
+        if method is None:
+            return hooks.get(name, None)
+        return hooks[name].get(method, None)
+
+    def get_query_plan(self):
+        if getattr(self, '_query_plan', None) is None:
+            self._query_plan = self.build_query_plan()
+        return self._query_plan
+
+    def build_query_plan(self):
+        """
+        Returns the plan of related objects and columns fetched for GET requests.
+
+        The relation paths touched by dehydrate hooks and methods are declared by the
+        `depends` option, the relations followed by the API field attributes like
+        `parent__name` are added automatically. To-one paths are selected by a join,
+        to-many paths are prefetched. The `only` option restricts fetched columns to
+        the exposed fields; by default it is used if there are no hooks or methods
+        which could touch other fields.
+        """
+        model = self._meta.object_class
+        select_related = list(self.settings.get('select_related', []))
+        prefetch_related = list(self.settings.get('prefetch_related', []))
+        depends = list(self.settings.get('depends', []))
+        for field in self.fields.values():
+            attribute = getattr(field, 'attribute', None)
+            if isinstance(attribute, basestring) and '__' in attribute:
+                depends.append(attribute.rsplit('__', 1)[0])
+        for path in depends:
+            if self.is_many_path(path):
+                prefetch_related.append(path)
+            else:
+                select_related.append(path)
+
+        concrete = set(f.name for f in model._meta.concrete_fields)
+        required = set([model._meta.pk.name, self.get_option('version_field', None), self.get_last_modified_field()])
+        required.update(p.split('__', 1)[0] for p in select_related + prefetch_related)
+        required.intersection_update(concrete)
+
+        only = self.settings.get('only', None)
+        if only is None:
+            only = not any(self.settings.get(k, None) for k in ('hydrate', 'dehydrate', 'methods'))
+        if only:
+            only = set(required)
+            only.update(getattr(f, 'attribute', None) for f in self.fields.values())
+            only = sorted(only.intersection(concrete))
+        return {
+            'select_related': sorted(set(select_related)),
+            'prefetch_related': sorted(set(prefetch_related)),
+            'only': only or None,
+            'required': required,
+            'concrete': concrete,
+        }
+
+    def is_many_path(self, path):
+        model = self._meta.object_class
+        for name in path.split('__'):
+            field = model._meta.get_field(name)
+            if field.many_to_many or field.one_to_many:
+                return True
+            model = field.related_model
+        return False
+
+    def apply_query_plan(self, object_list, requested_fields=None):
+        plan = self.get_query_plan()
+        if plan['select_related']:
+            object_list = object_list.select_related(*plan['select_related'])
+        if plan['prefetch_related']:
+            object_list = object_list.prefetch_related(*plan['prefetch_related'])
+        only = plan['only']
+        if only and requested_fields is not None:
+            only = set(getattr(self.fields[n], 'attribute', None) for n in requested_fields)
+            only = sorted(only.intersection(plan['concrete']).union(plan['required']))
+        if only:
+            object_list = object_list.only(*only)
+        return object_list
+
+    def get_object_list(self, request):
+        object_list = super(CakeModelResource,self).get_object_list(request)
+        if request is not None and request.method == 'GET':
+            object_list = self.apply_query_plan(object_list, self.get_requested_fields(request))
+        return object_list
+
+    def get_requested_fields(self, request):
+        """
+        Returns names of fields requested by `fields` and `exclude_fields` parameters, or None if all fields are requested
+        """
+        if request is None or not ('fields' in request.GET or 'exclude_fields' in request.GET):
+            return None
+        requested = set(self.fields)
+        if 'fields' in request.GET:
+            requested = self.check_requested_fields(request.GET.get('fields'))
+        if 'exclude_fields' in request.GET:
+            requested.difference_update(self.check_requested_fields(request.GET.get('exclude_fields')))
+        return requested
+
+    def check_requested_fields(self, value):
+        names = set(n.strip() for n in value.split(',') if n.strip())
+        for name in names:
+            try:
+                self.check_field_access(name)
+            except Exception, ex:
+                raise BadRequest("Bad field requested: %s" % ex)
+            if not name in self.fields:
+                raise BadRequest("Bad field requested: %s" % name)
+        return names
+
+    def full_dehydrate(self, bundle, for_list=False):
+        requested = self.get_requested_fields(bundle.request)
+        if requested is None:
+            return super(CakeModelResource,self).full_dehydrate(bundle, for_list=for_list)
+
+        # The same as the original, but dehydrates only requested fields
+        for field_name, field_object in self.fields.items():
+            if not field_name in requested:
+                continue
+            field_use_in = field_object.use_in
+            if callable(field_use_in):
+                if not field_use_in(bundle):
+                    continue
+            elif field_use_in not in ['all', 'list' if for_list else 'detail']:
+                continue
+
+            if field_object.dehydrated_type == 'related':
+                field_object.api_name = self._meta.api_name
+                field_object.resource_name = self._meta.resource_name
+
+            bundle.data[field_name] = field_object.dehydrate(bundle, for_list=for_list)
+
+            method = getattr(self, "dehydrate_%s" % field_name, None)
+            if method:
+                bundle.data[field_name] = method(bundle)
+
+        return self.dehydrate(bundle)
 
     @classmethod
     def get_fields(cls, fields=None, excludes=None):
@@ -447,17 +1031,9 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         if not cls._meta.object_class:
             return final_fields
 
-        version_settings = cls._application.version_api.settings or {}
-        app_settings = cls._application.settings or {}
         cls_settings = cls._settings or {}
         fields_settings = cls_settings.get('fields',{})
-        field_class_fn = cls_settings.get('api_field_from_django_field',
-            app_settings.get('api_field_from_django_field',
-                version_settings.get('api_field_from_django_field',
-                    cls.api_field_from_django_field
-                )
-            )
-        )
+        field_class_fn = cls.get_option('api_field_from_django_field', cls.api_field_from_django_field)
         if isinstance(field_class_fn,basestring):
             field_class_fn = cls._import_function(field_class_fn)
 
@@ -530,18 +1106,65 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         r = ModelResource.api_field_from_django_field(f, default=default)
         return r
 
+    STREAM_CHUNK_SIZE = 1000
+
+    def get_list(self, request, **kwargs):
+        return self.get_cached_response(request, self.build_list_response, **kwargs)
+
+    def build_list_response(self, request, **kwargs):
+        """
+        Returns the list of primary keys.
+
+        Only primary key values are fetched from the database, no objects are built
+        and dehydrated. The unlimited list (limit=0) in JSON is streamed, so the
+        memory used does not depend on the count of objects.
+        """
+        base_bundle = self.build_bundle(request=request)
+        objects = self.obj_get_list(bundle=base_bundle, **self.remove_api_resource_names(kwargs))
+        sorted_objects = self.apply_sorting(objects, options=request.GET)
+
+        paginator = self._meta.paginator_class(
+            request.GET, sorted_objects.prefetch_related(None).values_list('pk', flat=True),
+            resource_uri=self.get_resource_uri(), limit=self._meta.limit,
+            max_limit=self._meta.max_limit, collection_name=self._meta.collection_name
+        )
+        to_be_serialized = paginator.page()
+        if not to_be_serialized['meta']['limit'] and determine_format(request, self._meta.serializer) == 'application/json':
+            raise ImmediateHttpResponse(response=self.create_streaming_list_response(request, to_be_serialized))
+        to_be_serialized = self.alter_list_data_to_serialize(request, to_be_serialized)
+        return self.create_response(request, to_be_serialized)
+
+    def create_streaming_list_response(self, request, to_be_serialized):
+        collection_name = self._meta.collection_name
+        pk_values = to_be_serialized.pop(collection_name)
+        head = self._meta.serializer.serialize(to_be_serialized, 'application/json')
+
+        def content():
+            yield '%s, "%s": [' % (head[:-1], collection_name)
+            chunk = []
+            separator = ''
+            for pk in pk_values.iterator():
+                chunk.append(pk)
+                if len(chunk) >= self.STREAM_CHUNK_SIZE:
+                    yield separator + json.dumps(chunk, cls=DjangoJSONEncoder)[1:-1]
+                    separator = ', '
+                    chunk = []
+            if chunk:
+                yield separator + json.dumps(chunk, cls=DjangoJSONEncoder)[1:-1]
+            yield ']}'
+
+        return StreamingHttpResponse(content(), content_type=build_content_type('application/json'))
+
     def alter_list_data_to_serialize(self, request, to_be_serialized):
-        ## Flattening returned list
-        #to_be_serialized[self._meta.collection_name] = [v for m in to_be_serialized[self._meta.collection_name] for v in m.data.values()]
-        # Always use only primary key
-        to_be_serialized[self._meta.collection_name] = [m.data[self._meta.object_class._meta.pk.name] for m in to_be_serialized[self._meta.collection_name]]
+        # Always use only primary key, the paginated list contains primary key values already
+        to_be_serialized[self._meta.collection_name] = list(to_be_serialized[self._meta.collection_name])
         return to_be_serialized
 
     IGNORE_KEY_PREFIX = '-'
     MODEL_FIELD_PREFIX = '~'
 
     def get_resource_for_reference(self, field_name):
-        if field_name in self.settings.get('exclude',{}):
+        if field_name in self.settings['exclude']:
             return None
         field = self._meta.object_class._meta.get_field(field_name)
         model_to = None
@@ -558,10 +1181,32 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         return app_resource.model_resources.get(model_to._meta.model_name, None)
 
     def check_field_access(self, field_name):
+        return self.resolve_field_path(field_name).path
+
+    def resolve_field_path(self, field_name):
+        """
+        Returns the FieldPath for the field reference like `a__b__c`.
+
+        The result, including a refusal, is cached in the bounded field path cache,
+        because the same references come with every filter and sorting request.
+        """
+        ret = self.field_path_cache.get(field_name)
+        if ret is None:
+            try:
+                ret = self.build_field_path(field_name)
+            except Exception, ex:
+                ret = ex
+            self.field_path_cache.set(field_name, ret)
+        if isinstance(ret, Exception):
+            raise ret
+        return ret
+
+    def build_field_path(self, field_name):
         field_ref = field_name.split('__')
-        if field_ref[0] in self.settings.get('exclude',{}):
+        if field_ref[0] in self.settings['exclude']:
             raise ExpressionError("Field '{}' is excluded".format(field_ref[0]))
         field = self._meta.object_class._meta.get_field(field_ref[0])
+        many = bool(field.many_to_many or field.one_to_many)
         model_to = None
         if isinstance(field, (ForeignKey,ManyToManyField)):
             model_to = field.rel.model
@@ -574,8 +1219,9 @@ class CakeModelResource(BaseApiMixin, ModelResource):
             resource = app_resource.model_resources.get(model_to._meta.model_name, None)
             if not resource:
                 raise ExpressionError("Model '{}' is excluded".format(model_to._meta.model_name))
-            resource.check_field_access('__'.join(field_ref[1:]))
-        return field_name
+            target = resource.resolve_field_path('__'.join(field_ref[1:]))
+            return FieldPath(field_name, target.model, target.field, many or target.many)
+        return FieldPath(field_name, self._meta.object_class, field, many)
 
     def get_one_relations(self):
         return [f.name for f in self._meta.object_class._meta.get_fields() if isinstance(f, (ForeignKey, OneToOneRel, OneToOneField))]
@@ -600,29 +1246,94 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         return qset
 
     def parse_filter_condition(self, query):
+        values = []
+        shape = self.get_filter_shape(query, values)
+        template = self.filter_cache.get(shape)
+        if template is None:
+            template = self.compile_filter_shape(shape)
+            self.filter_cache.set(shape, template)
+        return self.render_filter(template, iter(values))
+
+    def get_filter_shape(self, query, values):
+        """
+        Returns the hashable shape of the filter condition.
+
+        The literal values are replaced by placeholders and appended to the values list,
+        so the conditions of the same shape share the compiled template.
+        """
         if (not isinstance(query, (dict))):
             if isinstance(query, (list, tuple)):
-                return self.parse_filter_list(query, lambda x, y: x & y)
+                return self.get_filter_list_shape(query, 'and', values)
             raise ExpressionError('Found {}, dictionary (or list) expected'.format(type(query)))
         if bool(query) & (len(query) > 1):
-            return self.parse_filter_list([{k:query[k]} for k in query], lambda x, y: x & y)
+            return self.get_filter_list_shape([{k:query[k]} for k in sorted(query)], 'and', values)
         for key, value in query.iteritems():
             if (key == 'or'):
-                return self.parse_filter_list(value, lambda x, y: x | y)
+                return self.get_filter_list_shape(value, 'or', values)
             elif (key == 'and'):
-                return self.parse_filter_list(value, lambda x, y: x & y)
+                return self.get_filter_list_shape(value, 'and', values)
             elif (key == 'not'):
-                return ~self.parse_filter_condition(value)
+                return ('not', self.get_filter_shape(value, values))
             elif (key.startswith(self.IGNORE_KEY_PREFIX)):
-                return self.parse_filter_condition(value)
-            else:
-                key = self.check_field_access(key.replace(".","__"))
-                if (value is None):
-                    key = key + '__isnull'
-                    value = True
-                elif (isinstance(value, basestring) and value.startswith(self.MODEL_FIELD_PREFIX)):
-                    value = F(self.check_field_access(value.replace(self.MODEL_FIELD_PREFIX, '', 1)))
-                return Q(**{key: value})
+                return self.get_filter_shape(value, values)
+            elif (value is None):
+                return ('isnull', key)
+            elif (isinstance(value, basestring) and value.startswith(self.MODEL_FIELD_PREFIX)):
+                return ('field', key, value)
+            values.append(value)
+            return ('value', key)
+        return ('all',)
+
+    def get_filter_list_shape(self, items, op, values):
+        if (not isinstance(items, (list, tuple))):
+            if (isinstance(items, (dict))):
+                return self.get_filter_list_shape([{k:items[k]} for k in sorted(items)], op, values)
+            raise ExpressionError('Found {}, list or tuple expected'.format(type(items).__name__))
+        if (not items):
+            raise ExpressionError('At least one condition must be specified in a list: %s' % (items,))
+        return (op,) + tuple(self.get_filter_shape(item, values) for item in items)
+
+    def compile_filter_shape(self, shape):
+        """
+        Returns the template for the filter shape checking access to all referenced fields
+        """
+        kind = shape[0]
+        if kind in ('and', 'or'):
+            return (kind,) + tuple(self.compile_filter_shape(s) for s in shape[1:])
+        elif kind == 'not':
+            return (kind, self.compile_filter_shape(shape[1]))
+        elif kind == 'isnull':
+            return (kind, self.check_field_access(shape[1].replace(".","__")) + '__isnull')
+        elif kind == 'field':
+            return (kind, self.check_field_access(shape[1].replace(".","__")), self.check_field_access(shape[2].replace(self.MODEL_FIELD_PREFIX, '', 1)))
+        elif kind == 'value':
+            return (kind, self.check_field_access(shape[1].replace(".","__")))
+        return shape
+
+    def render_filter(self, template, values):
+        """
+        Builds the Q object from the compiled template taking literal values from the iterator
+        """
+        kind = template[0]
+        if kind in ('and', 'or'):
+            qset = None
+            for t in template[1:]:
+                qq = self.render_filter(t, values)
+                if (qset):
+                    qset = (qset & qq) if kind == 'and' else (qset | qq)
+                else:
+                    qset = qq
+            if (not qset):
+                raise ExpressionError('At least one condition must be specified in a list')
+            return qset
+        elif kind == 'not':
+            return ~self.render_filter(template[1], values)
+        elif kind == 'isnull':
+            return Q(**{template[1]: True})
+        elif kind == 'field':
+            return Q(**{template[1]: F(template[2])})
+        elif kind == 'value':
+            return Q(**{template[1]: next(values)})
         return Q()
 
     def build_filters(self, filters=None, ignore_bad_filters=True):
@@ -655,12 +1366,36 @@ class CakeModelResource(BaseApiMixin, ModelResource):
                     semi_filtered = semi_filtered.filter(applicable_filters)
             except Exception,ex:
                 raise InvalidFilterError('%s' % ex)
-        return semi_filtered.distinct()
+        return self.apply_distinct(semi_filtered)
+
+    def apply_distinct(self, obj_list, many=False):
+        """
+        Applies DISTINCT only if the query joins a to-many relation and so may repeat rows.
+
+        The joins made by filters are found in the query, while ordering joins are made
+        only when the query is compiled, so the caller passes `many` for them.
+        The `distinct` option set to True or False forces or disables DISTINCT at all.
+        """
+        distinct = self.get_option('distinct', None)
+        if distinct is None:
+            distinct = many or self.has_multiple_joins(obj_list)
+        if distinct:
+            return obj_list.distinct()
+        return obj_list
+
+    @staticmethod
+    def has_multiple_joins(obj_list):
+        for join in obj_list.query.alias_map.values():
+            # Reverse relations (and so many-to-many relations going through the
+            # intermediate model) are the only joins multiplying the result rows
+            if getattr(getattr(join, 'join_field', None), 'multiple', False):
+                return True
+        return False
 
     def apply_sorting(self, obj_list, options=None):
         try:
             if not 'order_by' in options:
-                return obj_list
+                return self.apply_distinct(obj_list)
             if hasattr(options, 'getlist'):
                 order_bits = options.getlist('order_by')
             else:
@@ -671,19 +1406,33 @@ class CakeModelResource(BaseApiMixin, ModelResource):
             order_bits = [b for o in order_bits for b in o.split(',')]
 
             order_by_args = []
+            many = False
             for order_by in order_bits:
                 order = ''
                 if order_by.startswith('-'):
                     order = '-'
                     order_by = order_by[1:]
-                order_by = self.check_field_access(order_by.replace('.','__'))
-                order_by_args.append("%s%s" % (order, order_by))
-            return obj_list.order_by(*order_by_args).distinct()
+                field_path = self.resolve_field_path(order_by.replace('.','__'))
+                many = many or field_path.many
+                order_by_args.append("%s%s" % (order, field_path.path))
+            return self.apply_distinct(obj_list.order_by(*order_by_args), many)
         except Exception, ex:
             raise InvalidSortError('%s' % ex)
-        return obj_list.distinct()
+
+    def uses_dispatcher(self):
+        return self.app_api.version_api.uses_dispatcher()
+
+    def get_resource_uri(self, bundle_or_obj=None, url_name='api_dispatch_list'):
+        if bundle_or_obj is None and self.uses_dispatcher():
+            return self.get_list_endpoint()
+        return super(CakeModelResource,self).get_resource_uri(bundle_or_obj, url_name)
 
     def get_list_endpoint(self):
+        if self.uses_dispatcher():
+            top_level = self._build_reverse_url("api_%s_top_level" % self._meta.api_name, kwargs={
+                'api_name': self._meta.api_name,
+            })
+            return "%s%s/" % (top_level, self._meta.resource_name)
         return self._build_reverse_url("api_dispatch_list", kwargs={
             'api_name': self._meta.api_name,
             'resource_name': self._meta.resource_name,
@@ -696,6 +1445,8 @@ class CakeModelResource(BaseApiMixin, ModelResource):
             'list_endpoint': list_endpoint,
             'schema': "%s%s/" % (list_endpoint, 'schema'),
             'details': "%s%s/" % (list_endpoint, '<ID>'),
+            'set': "%sset/%s/" % (list_endpoint, '<ID>;<ID>'),
+            'bulk': "%sbulk/" % list_endpoint,
         }
         if self._meta.object_class.__doc__:
             schema['description'] = self._meta.object_class.__doc__
@@ -716,7 +1467,7 @@ class CakeModelResource(BaseApiMixin, ModelResource):
             else: # TODO!!!
                 pass
 
-        relations = [n for n in self.get_one_relations() + self.get_many_relations() if not n in self.settings.get('exclude',{})]
+        relations = [n for n in self.get_one_relations() + self.get_many_relations() if not n in self.settings['exclude']]
         if relations:
             schema['relations'] = {}
             for n in relations:
@@ -765,17 +1516,24 @@ class CakeModelResource(BaseApiMixin, ModelResource):
                 schema['relations'][n]['urls']['get'] = "%s%s/%s/" % (list_endpoint, '<ID>', n)
         return schema
 
+    def get_schema(self, request, **kwargs):
+        self.method_check(request, allowed=['get'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+        bundle = self.build_bundle(request=request)
+        self.authorized_read_detail(self.get_object_list(bundle.request), bundle)
+        return self.create_schema_response(request, ('schema',), self.build_schema)
+
     def hydrate(self, bundle):
-        method_ref = self.settings.get('hydrate', None)
-        if method_ref:
-            method_callable = self._import_function(method_ref)
+        method_callable = self.get_hook('hydrate')
+        if method_callable:
             bundle = method_callable(self, bundle)
         return bundle
 
     def dehydrate(self, bundle):
-        method_ref = self.settings.get('dehydrate', None)
-        if method_ref:
-            method_callable = self._import_function(method_ref)
+        method_callable = self.get_hook('dehydrate')
+        if method_callable:
             bundle = method_callable(self, bundle)
         return bundle
 
@@ -783,6 +1541,11 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         urls = super(CakeModelResource,self).prepend_urls()
         urls += [
             url(r"^(?P<resource_name>%s)/schema(?:/?)$" % (self._meta.resource_name), self.wrap_view('get_schema'), name="api_get_schema"),
+            url(
+                r"^(?P<resource_name>%s)/set(?:/(?P<%s_list>[^/]+))?/?$" % (self._meta.resource_name, self._meta.detail_uri_name),
+                self.wrap_view('get_multiple'), name="api_get_multiple"
+            ),
+            url(r"^(?P<resource_name>%s)/bulk/?$" % (self._meta.resource_name), self.wrap_view('post_bulk'), name="api_post_bulk"),
             url(
                 r"^(?P<resource_name>%s)/(?P<method>[^0-9][^/]*)/?$" % (self._meta.resource_name),
                 self.wrap_view('dispatch_classmethod'), name="api_dispatch_classmethod"
@@ -798,25 +1561,632 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         ]
         return urls
 
+    def route(self, path):
+        """
+        Returns the view name and its keyword arguments for the path relative to the resource URL,
+        or None if nothing matches.
+
+        Follows the order of URL patterns of the resource without trying them one by one.
+        """
+        detail_uri_name = self._meta.detail_uri_name
+        if not path:
+            return 'dispatch_list', {}
+        stripped = path[:-1] if path.endswith('/') else path
+        parts = stripped.split('/')
+        if parts[0] in ('schema', 'bulk') and len(parts) == 1:
+            return {'schema': 'get_schema', 'bulk': 'post_bulk'}[parts[0]], {}
+        if parts[0] == 'set' and len(parts) <= 2 and all(parts[1:]):
+            return 'get_multiple', {'%s_list' % detail_uri_name: parts[1] if len(parts) > 1 else None}
+        if len(parts) == 1:
+            if stripped and not stripped[0] in '0123456789':
+                return 'dispatch_classmethod', {'method': stripped}
+            if path.endswith('/'):
+                return 'dispatch_detail', {detail_uri_name: stripped}
+            return None
+        if not parts[-1]:
+            return None
+        if len(parts) > 2 and parts[-2]:
+            return 'dispatch_relation_method', {
+                detail_uri_name: '/'.join(parts[:-2]),
+                'relation': parts[-2],
+                'method': parts[-1],
+            }
+        return 'dispatch_method', {detail_uri_name: '/'.join(parts[:-1]), 'method': parts[-1]}
+
+    def get_view(self, view_name):
+        """
+        Returns the wrapped view by name, used by the dispatcher
+        """
+        views = self.__dict__.setdefault('_views', {})
+        if not view_name in views:
+            views[view_name] = self.wrap_view(view_name)
+        return views[view_name]
+
+    MAX_BATCH = 1000
+
+    def get_multiple(self, request, **kwargs):
+        """
+        Returns details of objects in the order of requested primary keys.
+
+        The keys are passed in the URL like `set/1;2;3/` for the GET request,
+        or as a JSON array in the body of the POST request to `set/`.
+        All objects are fetched by a single authorized query. The object not found
+        or not allowed to read is returned as a marker like `{"pk": 1, "error": "NotFound"}`.
+        """
+        self.method_check(request, allowed=['get', 'post'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+
+        if request.method == 'POST':
+            try:
+                pk_list = self.deserialize(request, request.body)
+            except Exception, ex:
+                raise BadRequest("Arguments deserialization error: %s" % ex)
+        else:
+            pk_list = [pk for pk in (kwargs.get('%s_list' % self._meta.detail_uri_name, None) or '').split(';') if pk]
+        return self.get_cached_response(request, self.build_multiple_response, pk_list)
+
+    def build_multiple_response(self, request, pk_list):
+        pk_list = self.check_pk_list(pk_list)
+
+        object_list = self.get_object_list(request).filter(pk__in=set(pk_list))
+        objects = dict((obj.pk, obj) for obj in object_list)
+        allowed = self.get_allowed_pks(request, 'read', objects.values(), object_list)
+
+        ret = []
+        for pk in pk_list:
+            if pk in allowed:
+                bundle = self.full_dehydrate(self.build_bundle(obj=objects[pk], request=request))
+                ret.append(self.alter_detail_data_to_serialize(request, bundle))
+            else:
+                ret.append({'pk': pk, 'error': 'Unauthorized' if pk in objects else 'NotFound'})
+        data = {self._meta.collection_name: ret}
+        included = self.get_included(request, [objects[pk] for pk in pk_list if pk in allowed])
+        if included is not None:
+            data['included'] = included
+        return self.create_response(request, data)
+
+    def get_detail(self, request, **kwargs):
+        return self.get_cached_response(request, self.build_detail_response, **kwargs)
+
+    def build_detail_response(self, request, **kwargs):
+        """
+        Returns the object details, with related objects requested by the `include` parameter
+        """
+        basic_bundle = self.build_bundle(request=request)
+        try:
+            obj = self.cached_obj_get(bundle=basic_bundle, **self.remove_api_resource_names(kwargs))
+        except ObjectDoesNotExist:
+            return HttpNotFound()
+        except MultipleObjectsReturned:
+            return HttpMultipleChoices("More than one resource is found at this URI.")
+
+        etag, last_modified = self.get_detail_validators(request, obj)
+        if self._is_not_modified(request, etag, last_modified):
+            return self.get_not_modified_response(etag, last_modified)
+
+        bundle = self.full_dehydrate(self.build_bundle(obj=obj, request=request))
+        bundle = self.alter_detail_data_to_serialize(request, bundle)
+        included = self.get_included(request, [obj])
+        if included is not None:
+            bundle.data['included'] = included
+        ret = self.create_response(request, bundle)
+        if etag is not None:
+            ret['ETag'] = etag
+        if last_modified is not None:
+            ret['Last-Modified'] = http_date(last_modified)
+        return ret
+
+    def get_last_modified_field(self):
+        """
+        Returns the name of the field keeping the modification time of the object, or None.
+
+        The field is set explicitly by the `last_modified` option only, as no field of the model
+        is known to track every change of the object details.
+        """
+        return self.get_option('last_modified', None) or None
+
+    def get_detail_validators(self, request, obj):
+        """
+        Returns the ETag and Last-Modified timestamp of the object details known before dehydration, or None values.
+
+        The ETag is built from the `version_field` option field value, or the modification time.
+        Details including other objects have no such validators.
+        """
+        if 'include' in request.GET:
+            return None, None
+        last_modified = None
+        field = self.get_last_modified_field()
+        value = getattr(obj, field) if field else None
+        if value is not None:
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.get_default_timezone())
+            last_modified = calendar.timegm(value.utctimetuple())
+
+        version_field = self.get_option('version_field', None)
+        version = getattr(obj, version_field) if version_field else value
+        if version is None:
+            return None, last_modified
+        etag = '"%s"' % hashlib.md5(('%s:%s:%s:%s:%r:%s' % (
+            self.version, self._meta.resource_name, obj.pk, version,
+            sorted((k, request.GET.getlist(k)) for k in request.GET),
+            determine_format(request, self._meta.serializer),
+        )).encode('utf-8')).hexdigest()
+        return etag, last_modified
+
+    @staticmethod
+    def get_not_modified_response(etag=None, last_modified=None):
+        ret = HttpNotModified()
+        if etag is not None:
+            ret['ETag'] = etag
+        if last_modified is not None:
+            ret['Last-Modified'] = http_date(last_modified)
+        return ret
+
+    def get_conditional_response(self, request, response):
+        """
+        Returns the 304 response if the copy of the client is still valid, or the response itself.
+
+        The ETag is the digest of the content, unless it is set by the response builder.
+        """
+        if request.method != 'GET' or response.status_code != 200 or response.streaming:
+            return response
+        if not 'ETag' in response:
+            response['ETag'] = '"%s"' % hashlib.md5(response.content).hexdigest()
+        last_modified = parse_http_date_safe(response['Last-Modified']) if 'Last-Modified' in response else None
+        if self._is_not_modified(request, response['ETag'], last_modified):
+            return self.get_not_modified_response(response['ETag'], last_modified)
+        return response
+
+    def get_response_cache(self):
+        """
+        Returns the ResponseCache of the resource, or None if responses are not cached.
+
+        Responses are cached for the `response_cache_timeout` option seconds (never if 0)
+        in the `response_cache` Django cache. Cached responses are dropped on any change
+        of the resource model, and models listed by the `response_cache_depends` option
+        like `['auth.group']`.
+        """
+        if getattr(self, '_response_cache', None) is None:
+            timeout = self.get_option('response_cache_timeout', 0)
+            if not timeout:
+                self._response_cache = False
+            else:
+                models = [self._meta.object_class] + [apps.get_model(m) for m in self.get_option('response_cache_depends', [])]
+                self._response_cache = ResponseCache(models, self.get_option('response_cache', 'default'), timeout)
+        return self._response_cache or None
+
+    def get_response_cache_scope(self, request):
+        """
+        Returns the key of the authorization scope of the request.
+
+        Requests of the same scope share cached responses. The scope is the user by default,
+        the `response_cache_scope` option refers to the function(resource, request) returning another one.
+        """
+        scope = self.get_option('response_cache_scope', None)
+        if scope:
+            return scope(self, request)
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return 'anonymous'
+        return 'user:%s' % user.pk
+
+    def get_cached_response(self, request, build, *args, **kwargs):
+        """
+        Returns the cached response of the GET request, or the response built and cached.
+
+        Responses embedding related objects by the `include` parameter depend on other models,
+        so they are never cached. The 304 response is returned instead, if the copy of the client is still valid.
+        """
+        response_cache = self.get_response_cache()
+        if response_cache is None or request.method != 'GET' or 'include' in request.GET:
+            return self.get_conditional_response(request, build(request, *args, **kwargs))
+
+        key = response_cache.get_key(
+            self.version, self._meta.resource_name, request.path,
+            sorted((k, request.GET.getlist(k)) for k in request.GET),
+            determine_format(request, self._meta.serializer),
+            self.get_response_cache_scope(request),
+        )
+        cached = response_cache.get(key)
+        if cached is not None:
+            content, content_type, headers = cached
+            response = HttpResponse(content=content, content_type=content_type)
+            for name, value in headers:
+                response[name] = value
+            return self.get_conditional_response(request, response)
+        response = self.get_conditional_response(request, build(request, *args, **kwargs))
+        if response.status_code == 200 and not response.streaming:
+            headers = [(name, response[name]) for name in ('ETag', 'Last-Modified') if name in response]
+            response_cache.set(key, (response.content, response['Content-Type'], headers))
+        return response
+
+    MAX_INCLUDE_DEPTH = 3
+    MAX_INCLUDE_OBJECTS = 1000
+
+    def get_included(self, request, objects):
+        """
+        Returns details of related objects requested by the `include` parameter like `include=parent,parent.editor_group`.
+
+        Every included path, and every intermediate one, is mapped to details of related objects
+        by their primary keys. Related objects of a path are fetched by a single query authorized
+        by the target resource. The depth of paths and the total number of included objects are
+        limited by the `max_include_depth` and `max_include_objects` options.
+        Returns None if nothing is requested.
+        """
+        paths = self.get_include_paths(request)
+        if not paths:
+            return None
+        include_request = self.get_include_request(request)
+        max_objects = self.get_option('max_include_objects', self.MAX_INCLUDE_OBJECTS)
+        budget = max_objects
+        fetched = {(): (self, [obj.pk for obj in objects])}
+        ret = {}
+        for path in paths:
+            resource, pks = fetched[path[:-1]]
+            target, target_objects = resource.get_included_objects(include_request, path[-1], pks, budget + 1)
+            if len(target_objects) > budget:
+                raise BadRequest("Too many included objects, the maximum is %s" % max_objects)
+            budget -= len(target_objects)
+            fetched[path] = (target, [obj.pk for obj in target_objects])
+            ret['.'.join(path)] = dict(
+                (force_text(obj.pk), target.alter_detail_data_to_serialize(include_request, target.full_dehydrate(target.build_bundle(obj=obj, request=include_request))).data)
+                for obj in target_objects
+            )
+        return ret
+
+    def get_include_paths(self, request):
+        """
+        Returns requested include paths, completed by intermediate ones, as tuples of relation names, parents first
+        """
+        value = request.GET.get('include', None) if request is not None else None
+        if not value:
+            return []
+        max_depth = self.get_option('max_include_depth', self.MAX_INCLUDE_DEPTH)
+        paths = set()
+        for item in value.split(','):
+            if not item.strip():
+                continue
+            path = tuple(n.strip() for n in item.replace('__', '.').split('.'))
+            if not all(path):
+                raise BadRequest("Bad include path: %s" % item)
+            if max_depth and len(path) > max_depth:
+                raise BadRequest("Too deep include path: %s, the maximum depth is %s" % (item, max_depth))
+            paths.update(path[:i] for i in range(1, len(path) + 1))
+        return sorted(paths, key=lambda p: (len(p), p))
+
+    @staticmethod
+    def get_include_request(request):
+        """
+        Returns the request for included resources sharing the request cache, without sparse fields parameters
+        """
+        request_cache(request)
+        include_request = copy.copy(request)
+        include_request.GET = request.GET.copy()
+        for name in ('fields', 'exclude_fields', 'include'):
+            include_request.GET.pop(name, None)
+        return include_request
+
+    def get_included_objects(self, request, relation, pks, limit):
+        """
+        Returns the resource referenced by the relation, and up to limit its objects related to objects with passed keys
+        """
+        from django.core.exceptions import FieldDoesNotExist
+        try:
+            field = self._meta.object_class._meta.get_field(relation)
+        except FieldDoesNotExist, ex:
+            raise BadRequest("No such relation: %s" % relation)
+        resource = self.get_resource_for_reference(relation)
+        if not resource:
+            raise BadRequest("The resource is not allowed for this relation: %s" % relation)
+        if not pks:
+            return resource, []
+        return resource, resource.get_readable_objects(request, {'%s__in' % field.remote_field.name: pks}, limit)
+
+    def get_readable_objects(self, request, flt, limit):
+        """
+        Returns up to limit objects matching the filter and allowed to read.
+
+        The set based authorization is applied by the same query.
+        """
+        if self.get_bulk_authorization().set_based['read']:
+            base, authorized = self.get_authorized_list(request, 'read')
+            if authorized is None:
+                return []
+            if hasattr(authorized, 'filter'):
+                return list(self.apply_distinct(authorized.filter(**flt))[:limit])
+        object_list = self.apply_distinct(self.get_object_list(request).filter(**flt))
+        objects = list(object_list[:limit])
+        allowed = self.get_allowed_pks(request, 'read', objects, object_list)
+        return [obj for obj in objects if obj.pk in allowed]
+
+    def get_bulk_authorization(self):
+        """
+        Returns the BulkAuthorization adapter of the resource authorization
+        """
+        if getattr(self, '_bulk_authorization', None) is None:
+            self._bulk_authorization = BulkAuthorization(self._meta.authorization)
+        return self._bulk_authorization
+
+    def get_authorized_list(self, request, access):
+        """
+        Returns the pair of the object list of the resource and this list filtered
+        by the `<access>_list` authorization method (None if the access is not allowed at all).
+
+        The pair is cached for the request, so the authorization rules are applied
+        once per resource and access kind, however many objects are checked.
+        """
+        def build():
+            object_list = self.get_object_list(request)
+            bundle = self.build_bundle(request=request)
+            return object_list, self.get_bulk_authorization().authorized_list(object_list, bundle, access)
+        return request_cached(request, ('authorized_list', self.version, self._meta.resource_name, access), build)
+
+    def get_allowed_pks(self, request, access, objects, object_list=None):
+        """
+        Returns primary keys of the objects allowed for the access.
+
+        The result for every object is remembered for the request, so the same object
+        is never checked twice. The set based authorization filters the cached authorized
+        list by the keys not checked yet, otherwise the `<access>_detail` method is called
+        for every such object of the `object_list`.
+        """
+        checked = request_cached(request, ('allowed_pks', self.version, self._meta.resource_name, access), dict)
+        unknown = [obj for obj in objects if not obj.pk in checked]
+        if unknown:
+            pks = set(obj.pk for obj in unknown)
+            authorization = self.get_bulk_authorization()
+            authorized = self.get_authorized_list(request, access) if authorization.set_based[access] else None
+            if object_list is None:
+                object_list = self.get_object_list(request).filter(pk__in=pks)
+            allowed = authorization.allowed_pks(object_list, self.build_bundle(request=request), access, unknown, authorized)
+            for pk in pks:
+                checked[pk] = pk in allowed
+        return set(obj.pk for obj in objects if checked[obj.pk])
+
+    def authorized_read_detail(self, object_list, bundle):
+        return self.authorized_detail(object_list, bundle, 'read')
+
+    def authorized_update_detail(self, object_list, bundle):
+        return self.authorized_detail(object_list, bundle, 'update')
+
+    def authorized_delete_detail(self, object_list, bundle):
+        return self.authorized_detail(object_list, bundle, 'delete')
+
+    def authorized_detail(self, object_list, bundle, access):
+        """
+        Checks the access to the stored object using results cached for the request.
+
+        New objects and bundles carrying data, which may be inspected by the authorization,
+        are checked by the original tastypie way.
+        """
+        obj = bundle.obj
+        if obj is None or obj.pk is None or bundle.data or not self.get_bulk_authorization().set_based[access]:
+            return getattr(super(CakeModelResource,self), 'authorized_%s_detail' % access)(object_list, bundle)
+        if not obj.pk in self.get_allowed_pks(bundle.request, access, [obj], object_list):
+            self.unauthorized_result(Unauthorized("The %s access not allowed for the object %s%s/" % (access, self.get_list_endpoint(), obj.pk)))
+        return True
+
+    def check_batch_size(self, count):
+        max_batch = self.get_option('max_batch', self.MAX_BATCH)
+        if max_batch and count > max_batch:
+            raise BadRequest("Too many objects requested: %s, the maximum is %s" % (count, max_batch))
+
+    def check_pk_list(self, pk_list):
+        """
+        Checks the number of passed primary keys and converts them to python values
+        """
+        if not isinstance(pk_list, (list, tuple)):
+            raise BadRequest("The list of primary keys expected")
+
+        self.check_batch_size(len(pk_list))
+
+        pk_field = self._meta.object_class._meta.pk
+        try:
+            return [pk_field.to_python(pk) for pk in pk_list]
+        except Exception, ex:
+            raise BadRequest("Bad primary key: %s" % ex)
+
+    def get_authorized_objects(self, request, pk_list, access=('read',)):
+        """
+        Returns objects in the order of passed primary keys, fetched by a single query.
+
+        The access to objects is checked for the whole set by the request cached authorization.
+        NotFound or Unauthorized error enlisting all failed keys is raised.
+        """
+        pk_list = self.check_pk_list(pk_list)
+        object_list = self.get_object_list(request).filter(pk__in=set(pk_list))
+        objects = dict((obj.pk, obj) for obj in object_list)
+
+        missing = [pk for pk in pk_list if not pk in objects]
+        if missing:
+            raise NotFound("No such objects %s: %s" % (self.get_list_endpoint(), ', '.join(force_text(pk) for pk in missing)))
+
+        for a in access:
+            allowed = self.get_allowed_pks(request, a, objects.values(), object_list)
+            failed = [pk for pk in pk_list if not pk in allowed]
+            if failed:
+                raise Unauthorized("The %s access not allowed for objects %s: %s" % (a, self.get_list_endpoint(), ', '.join(force_text(pk) for pk in failed)))
+
+        return [objects[pk] for pk in pk_list]
+
+    BULK_OPERATIONS = ('create', 'update', 'delete')
+
+    def post_bulk(self, request, **kwargs):
+        """
+        Applies the list of operations passed in the body of the POST request to `bulk/`.
+
+        Every operation looks like `{"op": "create", "data": {...}}`, `{"op": "update", "pk": 1, "data": {...}}`
+        or `{"op": "delete", "pk": 1}`. All operations are checked before any change, the objects
+        to be updated or deleted are fetched and authorized by a single query. The changes are
+        applied in a single transaction. The result for every operation is returned in the same
+        order like `{"pk": 1}`, or `{"pk": 1, "error": "NotFound", "description": "..."}`.
+        If any operation fails, nothing is changed and the response status is 400.
+        """
+        self.method_check(request, allowed=['post'])
+        self.is_authenticated(request)
+        self.throttle_check(request)
+        self.log_throttled_access(request)
+
+        try:
+            operations = self.deserialize(request, request.body)
+        except Exception, ex:
+            raise BadRequest("Arguments deserialization error: %s" % ex)
+        if not isinstance(operations, (list, tuple)):
+            raise BadRequest("The list of operations expected")
+        self.check_batch_size(len(operations))
+
+        results = [None] * len(operations)
+        keys = {}
+        pk_field = self._meta.object_class._meta.pk
+        for i, operation in enumerate(operations):
+            try:
+                if not isinstance(operation, dict) or not operation.get('op', None) in self.BULK_OPERATIONS:
+                    raise BadRequest("Operation expected like {\"op\": \"create\" | \"update\" | \"delete\", ...}")
+                if operation['op'] != 'create':
+                    try:
+                        keys[i] = pk_field.to_python(operation.get('pk', None))
+                    except Exception, ex:
+                        raise BadRequest("Bad primary key: %s" % ex)
+                    if keys[i] is None:
+                        raise BadRequest("The primary key expected")
+            except Exception, ex:
+                results[i] = self.get_bulk_error(operation.get('pk', None) if isinstance(operation, dict) else None, ex)
+
+        objects = {}
+        if keys:
+            object_list = self.get_object_list(request).filter(pk__in=set(keys.values()))
+            objects = dict((obj.pk, obj) for obj in object_list)
+            allowed = dict(
+                (access, self.get_allowed_pks(request, access, [objects[keys[i]] for i in keys if operations[i]['op'] == access and keys[i] in objects], object_list))
+                for access in ('update', 'delete')
+            )
+
+        creates, updates, deletes = [], [], []
+        for i, operation in enumerate(operations):
+            if results[i] is not None:
+                continue
+            pk = keys.get(i, None)
+            try:
+                if pk is not None and not pk in objects:
+                    raise NotFound("No such object %s%s/" % (self.get_list_endpoint(), pk))
+                if pk is not None and not pk in allowed[operation['op']]:
+                    raise Unauthorized("The %s access not allowed for the object %s%s/" % (operation['op'], self.get_list_endpoint(), pk))
+                if operation['op'] == 'delete':
+                    deletes.append((i, objects[pk]))
+                    continue
+                bundle = self.hydrate_bulk_bundle(request, objects.get(pk, None), operation.get('data', None) or {})
+                (creates if pk is None else updates).append((i, bundle))
+            except Exception, ex:
+                results[i] = self.get_bulk_error(pk, ex)
+
+        if any(results):
+            for i, operation in enumerate(operations):
+                if results[i] is None:
+                    results[i] = {'pk': keys.get(i, None)}
+            ret = self.create_response(request, {self._meta.collection_name: results})
+            ret.status_code = 400
+            return ret
+
+        with transaction.atomic():
+            self.save_bulk([b for i, b in creates], [b for i, b in updates], [o for i, o in deletes])
+        for i, bundle in creates + updates:
+            results[i] = {'pk': bundle.obj.pk}
+        for i, obj in deletes:
+            results[i] = {'pk': keys[i]}
+        return self.create_response(request, {self._meta.collection_name: results})
+
+    @staticmethod
+    def get_bulk_error(pk, ex):
+        if isinstance(ex, ImmediateHttpResponse):
+            return {'pk': pk, 'error': type(ex).__name__, 'description': force_text(ex.response.content)}
+        return {'pk': pk, 'error': type(ex).__name__, 'description': "%s" % ex}
+
+    def hydrate_bulk_bundle(self, request, obj, data):
+        """
+        Returns the hydrated and validated bundle for the new (obj is None) or existing object
+        """
+        if not isinstance(data, dict):
+            raise BadRequest("The data dictionary expected")
+        bundle = self.full_hydrate(self.build_bundle(obj=obj, data=dict((str(k), v) for k, v in data.items()), request=request))
+        if not self.is_valid(bundle):
+            raise BadRequest("%s" % bundle.errors)
+        if obj is None:
+            try:
+                if self._meta.authorization.create_detail(self.get_object_list(request), bundle) is not True:
+                    raise Unauthorized()
+            except Unauthorized:
+                raise Unauthorized("The create access not allowed for %s" % self.get_list_endpoint())
+        return bundle
+
+    def can_save_bulk(self):
+        """
+        Returns True if objects may be saved by bulk queries.
+
+        The `bulk_save` option set to True or False forces or disables bulk queries,
+        by default they are used if nobody listens to the model save signals
+        and the model does not override the `save` method.
+        """
+        bulk_save = self.get_option('bulk_save', None)
+        if bulk_save is None:
+            model = self._meta.object_class
+            bulk_save = not (
+                signals.pre_save.has_listeners(model) or signals.post_save.has_listeners(model) or
+                self.overrides_model_method(model, 'save')
+            )
+        return bulk_save
+
+    @staticmethod
+    def overrides_model_method(model, name):
+        return any(name in cls.__dict__ for cls in model.__mro__ if issubclass(cls, Model) and not cls is Model)
+
+    def save_bulk(self, creates, updates, deletes):
+        model = self._meta.object_class
+        manager = model._default_manager
+        bulk = self.can_save_bulk()
+        if creates:
+            # Keys of created objects are returned only by some databases
+            connection = connections[router.db_for_write(model)]
+            if bulk and connection.features.can_return_ids_from_bulk_insert:
+                manager.bulk_create([b.obj for b in creates])
+            else:
+                for b in creates:
+                    b.obj.save()
+        if updates:
+            fields = [
+                f.attribute for f in self.fields.values()
+                if not f.readonly and f.attribute in self.get_query_plan()['concrete'] and f.attribute != model._meta.pk.name
+            ]
+            # QuerySet.bulk_update appeared in Django 2.2, older versions save objects one by one
+            if bulk and fields and hasattr(manager, 'bulk_update'):
+                manager.bulk_update([b.obj for b in updates], fields)
+            else:
+                for b in updates:
+                    b.obj.save()
+        if deletes:
+            if self.overrides_model_method(model, 'delete'):
+                for obj in deletes:
+                    obj.delete()
+            else:
+                manager.filter(pk__in=[obj.pk for obj in deletes]).delete()
+
     def dispatch_classmethod(self, request, method=None, **kwargs):
-        method_ref = self.settings.get('classmethods',{}).get(method, None)
-        if not method_ref:
+        method_callable = self.get_hook('classmethods', method)
+        if not method_callable:
             raise NotFound("No such class method: %s" % method)
-        method_callable = self._import_function(method_ref)
         ret = method_callable(self, request, method=method, **kwargs)
         return ret
 
     def dispatch_method(self, request, method=None, **kwargs):
-        method_ref = self.settings.get('methods',{}).get(method, None)
-        if method_ref:
+        if self.get_hook('methods', method):
             return self.dispatch_instancemethod(request, method=method, **kwargs)
         return self.dispatch_relation(request, relation=method, **kwargs)
 
     def dispatch_instancemethod(self, request, method=None, **kwargs):
-        method_ref = self.settings.get('methods',{}).get(method, None)
-        if not method_ref:
+        method_callable = self.get_hook('methods', method)
+        if not method_callable:
             raise NotFound("No such method: %s" % method)
-        method_callable = self._import_function(method_ref)
         id = kwargs.get(self._meta.detail_uri_name)
         if id.isdigit():
             id = int(id)
@@ -850,21 +2220,71 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         if not resource:
             raise BadRequest("The resource is not allowed for this relation: %s" % relation)
 
-        if isinstance(field, (ForeignKey, OneToOneRel, OneToOneField)):
+        inline = self.is_inline_relation(request)
+        if inline:
+            # The relation is served inline only for reading, other requests should address objects directly
+            self.method_check(request, allowed=['get'])
+        if isinstance(field, (ForeignKey, OneToOneField)) and inline:
+            # The key is known without fetching the foreign object
+            foreign_pk = getattr(obj, field.get_attname())
+            if foreign_pk is None:
+                raise NotFound("No such object %s%s/%s/" % (self.get_list_endpoint(), id, relation))
+            return resource.inline_id_response(request, foreign_pk)
+        elif isinstance(field, (ForeignKey, OneToOneRel, OneToOneField)):
             try:
                 foreign_object = getattr(obj, relation)
             except Exception, ex:
                 raise NotFound("No such object %s%s/%s/" % (self.get_list_endpoint(), id, relation))
             if not foreign_object:
                 raise NotFound("No such object %s%s/%s/" % (self.get_list_endpoint(), id, relation))
+            if inline:
+                return resource.inline_id_response(request, foreign_object.pk)
             resource.redirect_to_object(request, foreign_object)
         elif isinstance(field, ManyToManyField):
+            if inline:
+                return resource.inline_filter_response(request, {field.rel.name:obj.pk})
             resource.redirect_to_filter(request, {field.rel.name:obj.pk})
         elif isinstance(field, (ManyToManyRel, ManyToOneRel)):
+            if inline:
+                return resource.inline_filter_response(request, {field.remote_field.name:obj.pk})
             resource.redirect_to_filter(request, {field.remote_field.name:obj.pk})
         else:
             raise Exception("WTF?")
 
+    def is_inline_relation(self, request):
+        """
+        Returns True if the relation should be served inline instead of the redirect.
+
+        The `inline` request parameter overrides the `inline_relations` option.
+        """
+        inline = request.GET.get('inline', None)
+        if inline is None:
+            return bool(self.get_option('inline_relations', False))
+        return not inline.lower() in ('', '0', 'false', 'no')
+
+    def inline_id_response(self, request, id):
+        """
+        Returns the response of the object details as if they were requested directly
+        """
+        return self.dispatch('detail', request, **{self._meta.detail_uri_name: id})
+
+    def inline_filter_response(self, request, flt):
+        """
+        Returns the response of the filtered list as if it were requested directly.
+
+        The filter passed in the request is applied together with the relation filter.
+        """
+        if 'filter' in request.GET:
+            try:
+                flt = [flt, json.loads(request.GET['filter'])]
+            except Exception, ex:
+                raise InvalidFilterError("%s" % ex)
+        request_cache(request)
+        inline_request = copy.copy(request)
+        inline_request.GET = request.GET.copy()
+        inline_request.GET['filter'] = json.dumps(flt)
+        return self.dispatch('list', inline_request)
+
     def dispatch_relation_method(self, request, relation=None, method=None, **kwargs):
         # check the request method
         if not request.method.lower() == 'post':
@@ -914,60 +2334,53 @@ class CakeModelResource(BaseApiMixin, ModelResource):
         elif isinstance(field, OneToOneRel):
             # For the foreign object the update should be allowed for the both, current and future objects
             foreign_bundle = resource.build_bundle(request=request)
-            foreign_obj = None
+            current_obj = None
             try:
-                foreign_obj = getattr(obj, field.get_accessor_name())
+                current_obj = getattr(obj, field.get_accessor_name())
             except Exception, ex:
                 pass
-            if foreign_obj:
-                foreign_bundle.obj = foreign_obj
+            if current_obj:
+                foreign_bundle.obj = current_obj
                 if not resource.authorized_update_detail(resource.get_object_list(foreign_bundle.request), foreign_bundle):
                     raise Unauthorized("Update not allowed while changing a relation: %s" % relation)
             # Future object
+            future_obj = None
             if arg:
                 try:
-                    foreign_obj = resource.cached_obj_get(bundle=foreign_bundle, **{
+                    future_obj = resource.cached_obj_get(bundle=foreign_bundle, **{
                         'resource_name': resource._meta.resource_name,
                         resource._meta.detail_uri_name: str(arg),
                     })
                 except Exception, ex:
-                    raise NotFound("No such object %s%s/" % (resource.get_list_endpoint(),id))
+                    raise NotFound("No such object %s%s/" % (resource.get_list_endpoint(),arg))
+                foreign_bundle.obj = future_obj
                 if not resource.authorized_update_detail(resource.get_object_list(foreign_bundle.request), foreign_bundle):
                     raise Unauthorized("Update not allowed while changing a relation: %s" % relation)
         elif isinstance(field, (ManyToOneRel, ManyToManyRel)):
             # For the set of foreign objects the update should be allowed for all these objects for the both, add and del, requests
-            foreign_bundle = resource.build_bundle(request=request)
-            for pk in arg:
-                try:
-                    foreign_obj = resource.cached_obj_get(bundle=foreign_bundle, **{
-                        'resource_name': resource._meta.resource_name,
-                        resource._meta.detail_uri_name: str(pk),
-                    })
-                except Exception, ex:
-                    raise NotFound("No such object %s%s/" % (resource.get_list_endpoint(),id))
-                if not resource.authorized_update_detail(resource.get_object_list(foreign_bundle.request), foreign_bundle):
-                    raise Unauthorized("Update not allowed while changing a relation: %s" % relation)
+            foreign_objects = resource.get_authorized_objects(request, arg, access=('read', 'update'))
+        if isinstance(field, ManyToManyField):
+            foreign_objects = resource.get_authorized_objects(request, arg)
 
         # updating relation
-        if isinstance(field, (ForeignKey, OneToOneField)):
-            setattr(obj, field.get_attname(), arg)
-            self.save(basic_bundle)
-        elif isinstance(field, (ManyToManyField, ManyToManyRel, ManyToOneRel)):
-            foreign_bundle = resource.build_bundle(request=request)
-            mthd = getattr(getattr(obj, field.get_accessor_name()), method, None)
-            if not mthd:
-                raise BadRequest("The method '%s' not found for this relation: %s" % (method, relation))
-            foreign_objects = []
-            for pk in arg:
-                try:
-                    foreign_obj = resource.cached_obj_get(bundle=foreign_bundle, **{
-                        'resource_name': resource._meta.resource_name,
-                        resource._meta.detail_uri_name: str(pk),
-                    })
-                except Exception, ex:
-                    raise NotFound("No such object %s%s/" % (resource.get_list_endpoint(),id))
-                foreign_objects.append(foreign_obj)
-            mthd(*foreign_objects)
+        with transaction.atomic():
+            if isinstance(field, (ForeignKey, OneToOneField)):
+                setattr(obj, field.get_attname(), arg)
+                self.save(basic_bundle)
+            elif isinstance(field, OneToOneRel):
+                # The foreign object refers to the current one, so the reference is moved between foreign objects
+                if current_obj and (future_obj is None or current_obj.pk != future_obj.pk):
+                    setattr(current_obj, field.field.get_attname(), None)
+                    current_obj.save()
+                if future_obj:
+                    setattr(future_obj, field.field.get_attname(), obj.pk)
+                    future_obj.save()
+            elif isinstance(field, (ManyToManyField, ManyToManyRel, ManyToOneRel)):
+                accessor = field.get_accessor_name() if isinstance(field, ForeignObjectRel) else field.name
+                mthd = getattr(getattr(obj, accessor), method, None)
+                if not mthd:
+                    raise BadRequest("The method '%s' not found for this relation: %s" % (method, relation))
+                mthd(*foreign_objects)
         return HttpNoContent()
 
     def persistent_redirect_parameter_names(self):
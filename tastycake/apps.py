@@ -0,0 +1,12 @@
+from __future__ import unicode_literals
+
+from django.apps import AppConfig
+from django.core import checks
+
+
+class TastycakeConfig(AppConfig):
+    name = 'tastycake'
+
+    def ready(self):
+        from .checks import check_configuration
+        checks.register(check_configuration)
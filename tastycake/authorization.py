@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+
+from tastypie.bundle import Bundle
+from tastypie.exceptions import Unauthorized
+
+
+class BulkAuthorization(object):
+    """
+    Checks access to a set of objects using the wrapped tastypie authorization.
+
+    The `<access>_list` method of the authorization returns allowed objects by a single
+    filtered query, if it is defined in the class hierarchy not above the `<access>_detail`
+    method. Otherwise the authorization is supposed to implement per-object checks only,
+    and the `<access>_detail` method is called for every object.
+    """
+    ACCESS = ('read', 'update', 'delete')
+
+    def __init__(self, authorization):
+        self.authorization = authorization
+        self.set_based = dict((access, self.is_set_based(access)) for access in self.ACCESS)
+
+    def is_set_based(self, access):
+        mro = type(self.authorization).__mro__
+
+        def depth(name):
+            for i, cls in enumerate(mro):
+                if name in cls.__dict__:
+                    return i
+            return len(mro)
+
+        return depth('%s_list' % access) <= depth('%s_detail' % access)
+
+    def allowed_pks(self, object_list, bundle, access, objects=None, authorized=None):
+        """
+        Returns the set of primary keys of objects from the `object_list` allowed for the access.
+
+        The `objects` are already fetched objects of the `object_list`, if any.
+        The `authorized` is the pair of the base object list and the result of `authorized_list`
+        for it, if it is known already. The `object_list` should be a subset of the base list then.
+        """
+        if self.set_based[access]:
+            return self.allowed_pks_by_list(object_list, bundle, access, objects, authorized)
+        return self.allowed_pks_by_detail(object_list, bundle, access, objects)
+
+    def authorized_list(self, object_list, bundle, access):
+        """
+        Returns the object list filtered by the `<access>_list` method, or None if the access is not allowed at all
+        """
+        try:
+            return getattr(self.authorization, '%s_list' % access)(object_list, bundle)
+        except Unauthorized:
+            return None
+
+    def allowed_pks_by_list(self, object_list, bundle, access, objects=None, authorized=None):
+        base, allowed = authorized or (object_list, self.authorized_list(object_list, bundle, access))
+        if allowed is None:
+            return set()
+        if allowed is base:
+            allowed = object_list
+        pks = None if objects is None else set(obj.pk for obj in objects)
+        if allowed is object_list and pks is not None:
+            return pks
+        if hasattr(allowed, 'values_list'):
+            if pks is not None:
+                allowed = allowed.filter(pk__in=pks)
+            elif not allowed is object_list:
+                allowed = allowed.filter(pk__in=object_list.values('pk'))
+            return set(allowed.values_list('pk', flat=True))
+        ret = set(obj.pk for obj in allowed)
+        if pks is not None:
+            ret.intersection_update(pks)
+        elif not base is object_list:
+            ret.intersection_update(obj.pk for obj in object_list)
+        return ret
+
+    def allowed_pks_by_detail(self, object_list, bundle, access, objects=None):
+        method = getattr(self.authorization, '%s_detail' % access)
+        ret = set()
+        for obj in (objects if objects is not None else object_list):
+            try:
+                if method(object_list.filter(pk=obj.pk), Bundle(obj=obj, request=bundle.request)):
+                    ret.add(obj.pk)
+            except Unauthorized:
+                pass
+        return ret
@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+
+from django.core.cache import caches
+from django.db.models import signals
+
+import hashlib
+import threading
+import time
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_version_key(model):
+    return 'tastycake:version:%s.%s' % (model._meta.app_label, model._meta.model_name)
+
+
+def get_model_version(model, cache_alias='default'):
+    """
+    Returns the current version of the model data kept in the cache.
+
+    The initial version is taken from the clock, so the version evicted from the
+    cache never repeats, and responses cached before are never matched again.
+    """
+    cache = caches[cache_alias]
+    key = get_version_key(model)
+    version = cache.get(key, None)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key, None)
+    return version
+
+
+def change_model_version(model):
+    """
+    Changes the version of the model data in all caches where it is registered
+    """
+    key = get_version_key(model)
+    for cache_alias in _registry.get(model, ()):
+        cache = caches[cache_alias]
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def _changed_receiver(sender, **kwargs):
+    change_model_version(sender)
+
+
+def _m2m_changed_receiver(sender, instance=None, action=None, model=None, **kwargs):
+    if not action in ('post_add', 'post_remove', 'post_clear'):
+        return
+    change_model_version(type(instance))
+    if model is not None:
+        change_model_version(model)
+
+
+def register_model(model, cache_alias='default'):
+    """
+    Registers the model to change its version in the cache on every change of its data
+    """
+    with _registry_lock:
+        if not model in _registry:
+            uid = 'tastycake.cache.%s' % get_version_key(model)
+            signals.post_save.connect(_changed_receiver, sender=model, dispatch_uid=uid)
+            signals.post_delete.connect(_changed_receiver, sender=model, dispatch_uid=uid)
+            for field in model._meta.get_fields():
+                if field.many_to_many:
+                    through = getattr(field, 'through', None) or field.remote_field.through
+                    signals.m2m_changed.connect(_m2m_changed_receiver, sender=through, dispatch_uid=uid)
+        _registry.setdefault(model, set()).add(cache_alias)
+
+
+class ResponseCache(object):
+    """
+    Caches serialized responses in the Django cache.
+
+    The key of the response contains versions of all models the response depends on,
+    so any change of these models makes cached responses unreachable. They are removed
+    by the cache itself later.
+    """
+    def __init__(self, models, cache_alias='default', timeout=60):
+        self.models = list(models)
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        for model in self.models:
+            register_model(model, cache_alias)
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_key(self, *parts):
+        versions = [get_model_version(model, self.cache_alias) for model in self.models]
+        digest = hashlib.md5(repr((parts, versions)).encode('utf-8')).hexdigest()
+        return 'tastycake:response:%s' % digest
+
+    def get(self, key):
+        return self.cache.get(key, None)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
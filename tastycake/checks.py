@@ -0,0 +1,19 @@
+from __future__ import unicode_literals
+
+from django.conf import settings
+
+from importlib import import_module
+
+from .config import check_settings
+
+
+def get_api_settings(settings_name='TASTYCAKE'):
+    api_settings = getattr(settings, settings_name, None) or {}
+    if isinstance(api_settings, basestring):
+        module, name = api_settings.rsplit('.',1)
+        api_settings = getattr(import_module(module), name)
+    return api_settings
+
+
+def check_configuration(app_configs=None, **kwargs):
+    return check_settings(get_api_settings())
@@ -0,0 +1,222 @@
+from __future__ import unicode_literals
+
+from django.apps import apps
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured, FieldDoesNotExist
+
+from collections import Mapping
+from importlib import import_module
+
+
+# Options looked up through the model, application and version settings
+MODEL_OPTIONS = frozenset([
+    'authentication', 'authorization', 'api_field_from_django_field',
+    'pagination', 'count', 'count_cap', 'count_cache', 'count_cache_timeout',
+    'field_path_cache_size', 'filter_cache_size', 'distinct',
+    'version_field', 'last_modified',
+    'response_cache', 'response_cache_timeout', 'response_cache_depends', 'response_cache_scope',
+    'max_include_objects', 'max_include_depth', 'max_batch', 'bulk_save', 'inline_relations',
+])
+
+HOOKS = ('hydrate', 'dehydrate')
+HOOK_GROUPS = ('methods', 'classmethods')
+
+MODEL_SETTINGS = MODEL_OPTIONS.union([
+    'exclude', 'fields', 'relations', 'select_related', 'prefetch_related', 'depends', 'only',
+]).union(HOOKS).union(HOOK_GROUPS)
+
+APPLICATION_SETTINGS = MODEL_OPTIONS.union([
+    'exclude', 'models', 'version', 'description', 'verbose_name', 'serializer_class',
+])
+
+VERSION_SETTINGS = MODEL_OPTIONS.union([
+    'exclude', 'apps', 'name', 'description', 'verbose_name', 'serializer_class',
+    'lazy', 'dispatcher', 'warm_up',
+])
+
+# Options referring to callables by the dotted path
+REFERENCES = ('authentication', 'authorization', 'serializer_class', 'api_field_from_django_field', 'response_cache_scope')
+
+PAGINATIONS = ('offset', 'cursor')
+
+
+def import_reference(ref):
+    """
+    Returns the callable referred by the dotted path, or the callable itself
+    """
+    if callable(ref):
+        return ref
+    path = ref.rsplit('.',1)
+    if len(path) < 2:
+        raise ImproperlyConfigured("Bad function reference: %s" % ref)
+    try:
+        module = import_module(path[0])
+    except ImportError, ex:
+        raise ImproperlyConfigured("Bad function module: %s" % ex)
+
+    ret = getattr(module, path[1], None)
+    if not ret:
+        raise ImproperlyConfigured("No function implementation: %s" % ref)
+    return ret
+
+
+def get_references(settings):
+    """
+    Returns names of options referring to callables in the settings of any level
+    """
+    ret = [name for name in REFERENCES if settings.get(name, None)]
+    if settings.get('pagination', None) and not settings['pagination'] in PAGINATIONS:
+        ret.append('pagination')
+    return ret
+
+
+class FrozenSettings(Mapping):
+    """
+    Read-only settings of the API level built once.
+
+    The `exclude` list is frozen to the set joined with excludes inherited from the upper level,
+    so membership checks are cheap and the original settings are never changed. Options referring
+    to callables are imported here, so bad references fail at the start.
+    """
+    def __init__(self, settings=None, exclude=()):
+        data = dict(settings or {})
+        data['exclude'] = frozenset(exclude).union(data.get('exclude', ()))
+        for name in get_references(data):
+            data[name] = import_reference(data[name])
+        self._data = data
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return 'FrozenSettings(%r)' % self._data
+
+
+def get_sub_excludes(exclude, name):
+    """
+    Returns excludes of the lower level from dotted excludes like `name.sub` of the upper level
+    """
+    return [
+        e.split('.',1)[1]
+        for e in exclude
+        if e.split('.')[0] == name and len(e.split('.')) >= 2
+    ]
+
+
+def check_settings(api_settings):
+    """
+    Validates the whole settings tree, returning the list of check messages
+    """
+    messages = []
+    if not isinstance(api_settings, Mapping):
+        return [checks.Error("Settings should be a dictionary of versions", id='tastycake.E003')]
+    for version, version_settings in sorted(api_settings.items()):
+        messages += check_level(version, version_settings, VERSION_SETTINGS)
+        if not isinstance(version_settings, Mapping):
+            continue
+        for e in version_settings.get('exclude', ()):
+            messages += check_exclude(version, e.split('.'))
+        apps_settings = version_settings.get('apps', {})
+        messages += check_mapping('%s.apps' % version, apps_settings)
+        if not isinstance(apps_settings, Mapping):
+            continue
+        for application, app_settings in sorted(apps_settings.items()):
+            path = '%s.%s' % (version, application)
+            messages += check_level(path, app_settings, APPLICATION_SETTINGS)
+            if not isinstance(app_settings, Mapping):
+                continue
+            messages += check_exclude('%s.apps' % version, [application])
+            for e in app_settings.get('exclude', ()):
+                messages += check_exclude(path, [application] + e.split('.'))
+            models_settings = app_settings.get('models', {})
+            messages += check_mapping('%s.models' % path, models_settings)
+            if not isinstance(models_settings, Mapping):
+                continue
+            for model, model_settings in sorted(models_settings.items()):
+                model_path = '%s.%s' % (path, model)
+                messages += check_level(model_path, model_settings, MODEL_SETTINGS)
+                if not isinstance(model_settings, Mapping):
+                    continue
+                messages += check_exclude('%s.models' % path, [application, model])
+                for e in model_settings.get('exclude', ()):
+                    messages += check_exclude(model_path, [application, model, e])
+                messages += check_hooks(model_path, model_settings)
+    return messages
+
+
+def check_mapping(path, value):
+    if isinstance(value, Mapping):
+        return []
+    return [checks.Error("%s should be a dictionary" % path, id='tastycake.E003')]
+
+
+def check_level(path, settings, known):
+    """
+    Checks settings of one level: the version, application or model
+    """
+    messages = check_mapping(path, settings)
+    if messages:
+        return messages
+    for name in sorted(set(settings).difference(known)):
+        messages.append(checks.Warning(
+            "Unknown setting %s.%s" % (path, name),
+            hint="Known settings are: %s" % ', '.join(sorted(known)),
+            id='tastycake.W001',
+        ))
+    for name in get_references(settings):
+        try:
+            import_reference(settings[name])
+        except Exception, ex:
+            messages.append(checks.Error(
+                "Bad reference in %s.%s: %s" % (path, name, ex),
+                hint="Use the dotted path of the callable, like 'someapp.api.authorization'",
+                id='tastycake.E002',
+            ))
+    return messages
+
+
+def check_hooks(path, model_settings):
+    references = [(name, model_settings[name]) for name in HOOKS if model_settings.get(name, None)]
+    for group in HOOK_GROUPS:
+        group_settings = model_settings.get(group, {})
+        if not isinstance(group_settings, Mapping):
+            return check_mapping('%s.%s' % (path, group), group_settings)
+        references += [('%s.%s' % (group, name), ref) for name, ref in sorted(group_settings.items()) if ref]
+    messages = []
+    for name, ref in references:
+        try:
+            import_reference(ref)
+        except Exception, ex:
+            messages.append(checks.Error(
+                "Bad hook reference in %s.%s: %s" % (path, name, ex),
+                hint="Use the dotted path of the callable, like 'someapp.api.somechild_dehydrate'",
+                id='tastycake.E001',
+            ))
+    return messages
+
+
+def check_exclude(path, parts):
+    """
+    Checks that the application, model and field referred by parts exist
+    """
+    kind = 'application'
+    try:
+        app_config = apps.get_app_config(parts[0])
+        if len(parts) > 1:
+            kind = 'model'
+            model = app_config.get_model(parts[1])
+            if len(parts) > 2:
+                kind = 'field'
+                model._meta.get_field(parts[2])
+    except (LookupError, FieldDoesNotExist):
+        return [checks.Warning(
+            "%s refers to the unknown %s: %s" % (path, kind, '.'.join(parts)),
+            id='tastycake.W002',
+        )]
+    return []
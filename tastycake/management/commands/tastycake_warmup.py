@@ -0,0 +1,28 @@
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from importlib import import_module
+
+import time
+
+from tastycake.api import Api
+
+
+class Command(BaseCommand):
+    help = "Builds model resources of the API selected by names like v1, v1.auth or v1.auth.user, and reports the time spent"
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help="Names of versions, applications or models to build, all if omitted")
+
+    def handle(self, *args, **options):
+        import_module(settings.ROOT_URLCONF)
+        names = options['names'] or None
+        for api in list(Api.instances):
+            started = time.time()
+            resources = api.warm_up(names)
+            self.stdout.write("%s resources built in %.3f s" % (len(resources), time.time() - started))
+            if options['verbosity'] > 1:
+                for resource in resources:
+                    self.stdout.write("  %s/%s" % (resource.version, resource._meta.resource_name))
@@ -0,0 +1,274 @@
+from __future__ import unicode_literals
+
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, F, Manager
+from django.utils import six
+
+from tastypie.exceptions import BadRequest
+from tastypie.paginator import Paginator as _Paginator
+
+import base64
+import datetime
+import hashlib
+import json
+
+
+class Paginator(_Paginator):
+    """
+    Offset paginator with a configurable total count strategy.
+
+    The `count_strategy` is one of:
+      - 'exact' counts all objects
+      - 'none' does not count at all
+      - 'capped' counts up to the `count_cap` objects
+      - 'estimate' takes the planner row estimate where the database provides it
+        (PostgreSQL), and counts exactly when the estimate is under the `count_cap`
+
+    The count is not exact in the last three cases, so the next page presence
+    is detected fetching one more object than requested.
+
+    The counts are cached for `count_cache_timeout` seconds (never if 0) in the
+    `count_cache` Django cache. The cache key is built from the SQL query, so
+    the same filter and authorization combination share the count.
+    """
+    count_strategy = 'exact'
+    count_cap = 1000
+    count_cache = 'default'
+    count_cache_timeout = 0
+
+    def get_count_cache_key(self):
+        sql, params = self.objects.query.sql_with_params()
+        digest = hashlib.md5(('%s:%s:%r' % (self.count_cap, sql, params)).encode('utf-8')).hexdigest()
+        return 'tastycake:count:%s:%s' % (self.count_strategy, digest)
+
+    def get_count(self):
+        """
+        Returns the total count of objects, or None, and sets the `count_exact` flag
+        """
+        self.count_exact = self.count_strategy == 'exact'
+        if self.count_strategy == 'none':
+            self.count_exact = False
+            return None
+        if not hasattr(self.objects, 'query'):
+            self.count_exact = True
+            return len(self.objects)
+
+        try:
+            cache_key = self.get_count_cache_key()
+        except EmptyResultSet:
+            self.count_exact = True
+            return 0
+        cache = caches[self.count_cache] if self.count_cache_timeout else None
+        if cache is not None:
+            cached = cache.get(cache_key, None)
+            if cached is not None:
+                count, self.count_exact = cached
+                return count
+
+        count = None
+        if self.count_strategy == 'estimate':
+            count = self.get_estimated_count()
+            if count is not None and count > self.count_cap:
+                self.count_exact = False
+            else:
+                count = None
+        if self.count_strategy == 'capped':
+            count = self.objects[:self.count_cap + 1].count()
+            self.count_exact = count <= self.count_cap
+            count = min(count, self.count_cap)
+        if count is None:
+            self.count_exact = True
+            count = self.objects.count()
+
+        if cache is not None:
+            cache.set(cache_key, (count, self.count_exact), self.count_cache_timeout)
+        return count
+
+    def get_estimated_count(self):
+        connection = connections[self.objects.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = self.objects.query.get_compiler(self.objects.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, six.string_types):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def page(self):
+        limit = self.get_limit()
+        offset = self.get_offset()
+        count = self.get_count()
+        meta = {
+            'offset': offset,
+            'limit': limit,
+            'total_count': count,
+        }
+        if self.count_exact:
+            objects = self.get_slice(limit, offset)
+            if limit:
+                meta['next'] = self.get_next(limit, offset, count)
+        else:
+            meta['total_count_exact'] = False
+            objects = self.get_slice(limit + 1 if limit else limit, offset)
+            if limit:
+                objects = list(objects)
+                meta['next'] = self._generate_uri(limit, offset + limit) if len(objects) > limit else None
+                objects = objects[:limit]
+        if limit:
+            meta['previous'] = self.get_previous(limit, offset)
+
+        return {
+            self.collection_name: objects,
+            'meta': meta,
+        }
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    Keeps microseconds of time values truncated by the DjangoJSONEncoder, as cursor values are compared exactly
+    """
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super(CursorEncoder, self).default(o)
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset (cursor) paginator.
+
+    The page is continued from the opaque `cursor` request parameter, holding
+    the ordering values of the last returned object, instead of the `offset`,
+    so every page costs the same whatever deep it is. The ordering is taken from
+    the queryset, the primary key is added to it to make the order unique.
+    NULL values of ordering fields follow any other value on every database.
+
+    The total count is returned only when asked by the `total_count` request parameter,
+    using the count strategy of the paginator.
+    """
+    def get_ordering(self):
+        ordering = [o for o in self.objects.query.order_by if o != '?']
+        names = [o.lstrip('-') for o in ordering]
+        if 'pk' not in names and self.objects.model._meta.pk.name not in names:
+            ordering.append('pk')
+        return ordering
+
+    def encode_cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values, cls=CursorEncoder).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor, ordering):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except Exception:
+            raise BadRequest("Invalid cursor '%s' provided." % cursor)
+        if not isinstance(values, list) or len(values) != len(ordering):
+            raise BadRequest("Invalid cursor '%s' provided." % cursor)
+        return values
+
+    def get_cursor_values(self, obj, ordering):
+        if not hasattr(obj, '_meta'):
+            # The paginated list contains primary key values only
+            if ordering == ['pk']:
+                return [obj]
+            obj = self.objects.model._default_manager.get(pk=obj)
+        values = []
+        for o in ordering:
+            value = obj
+            for name in o.lstrip('-').split('__'):
+                value = getattr(value, name) if value is not None else None
+            if isinstance(value, Manager):
+                raise BadRequest("Cursor pagination is not available when ordering by a to-many relation: %s" % o)
+            if hasattr(value, '_meta'):
+                value = value.pk
+            values.append(value)
+        return values
+
+    def get_order_by(self, ordering):
+        """
+        Returns the ordering expressions placing NULL after any value, whatever the database default is
+        """
+        return [
+            F(o[1:]).desc(nulls_first=True) if o.startswith('-') else F(o).asc(nulls_last=True)
+            for o in ordering
+        ]
+
+    @staticmethod
+    def get_equal_filter(name, value):
+        if value is None:
+            return Q(**{'%s__isnull' % name: True})
+        return Q(**{name: value})
+
+    @staticmethod
+    def get_following_filter(name, value, descending):
+        """
+        Returns the condition selecting values following the value in the order, NULL being after any value,
+        or None if nothing follows
+        """
+        if descending:
+            if value is None:
+                return Q(**{'%s__isnull' % name: False})
+            return Q(**{'%s__lt' % name: value})
+        if value is None:
+            return None
+        return Q(**{'%s__gt' % name: value}) | Q(**{'%s__isnull' % name: True})
+
+    def get_cursor_filter(self, ordering, values):
+        """
+        Returns the condition selecting objects following the cursor values in the ordering
+        """
+        qset = None
+        for i, o in enumerate(ordering):
+            qq = self.get_following_filter(o.lstrip('-'), values[i], o.startswith('-'))
+            if qq is None:
+                continue
+            for j in range(i):
+                qq &= self.get_equal_filter(ordering[j].lstrip('-'), values[j])
+            qset = (qset | qq) if qset is not None else qq
+        return qset
+
+    def get_cursor_uri(self, limit, cursor):
+        if self.resource_uri is None:
+            return None
+        request_params = self.request_data.copy()
+        for k in ('offset', 'limit', 'cursor'):
+            if k in request_params:
+                del request_params[k]
+        request_params.update({'limit': limit, 'cursor': cursor})
+        return '%s?%s' % (self.resource_uri, request_params.urlencode())
+
+    def page(self):
+        limit = self.get_limit()
+        ordering = self.get_ordering()
+        objects = self.objects.order_by(*self.get_order_by(ordering))
+
+        cursor = self.request_data.get('cursor', None)
+        if cursor:
+            qset = self.get_cursor_filter(ordering, self.decode_cursor(cursor, ordering))
+            objects = objects.filter(qset) if qset is not None else objects.none()
+
+        if limit:
+            objects = list(objects[:limit + 1])
+        next_cursor = None
+        if limit and len(objects) > limit:
+            objects = objects[:limit]
+            next_cursor = self.encode_cursor(self.get_cursor_values(objects[-1], ordering))
+
+        meta = {
+            'limit': limit,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+            'next': self.get_cursor_uri(limit, next_cursor) if next_cursor else None,
+            'previous': None,
+        }
+        if self.request_data.get('total_count', '') not in ('', '0', 'false', 'False'):
+            meta['total_count'] = self.get_count()
+
+        return {
+            self.collection_name: objects,
+            'meta': meta,
+        }
@@ -0,0 +1,155 @@
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+import threading
+
+
+class LRUCache(object):
+    """
+    A size-bounded dictionary evicting the least recently used key.
+
+    Counts hits and misses to make the cache efficiency observable.
+    """
+    def __init__(self, size=1024):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+class QueryCounter(object):
+    """
+    Counts queries executed on all database connections inside the context
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        from django.db import connections
+        self._state = [
+            (connection, connection.force_debug_cursor, len(connection.queries_log))
+            for connection in connections.all()
+        ]
+        for connection, force_debug_cursor, initial in self._state:
+            connection.force_debug_cursor = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for connection, force_debug_cursor, initial in self._state:
+            connection.force_debug_cursor = force_debug_cursor
+            self.count += len(connection.queries_log) - initial
+
+
+def request_cache(request):
+    """
+    Returns the dictionary living as long as the request
+    """
+    if request is None:
+        return {}
+    cache = getattr(request, '_tastycake_cache', None)
+    if cache is None:
+        cache = request._tastycake_cache = {}
+    return cache
+
+
+def request_cached(request, key, build):
+    """
+    Returns the value cached for the request by the key, building it on the first call
+    """
+    cache = request_cache(request)
+    if not key in cache:
+        cache[key] = build()
+    return cache[key]
+
+
+class LazyDict(object):
+    """
+    A dictionary with the fixed set of keys, building the value on the first access to the key
+    """
+    def __init__(self, keys, build):
+        self._keys = set(keys)
+        self._build = build
+        self._data = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        try:
+            return self._data[key]
+        except KeyError:
+            pass
+        if not key in self._keys:
+            raise KeyError(key)
+        with self._lock:
+            if not key in self._data:
+                self._data[key] = self._build(key)
+            return self._data[key]
+
+    def get(self, key, default=None):
+        if not key in self._keys:
+            return default
+        return self[key]
+
+    def is_loaded(self, key):
+        return key in self._data
+
+    def loaded(self):
+        """
+        Returns the dictionary of values built before
+        """
+        return dict(self._data)
+
+    def load(self, keys=None):
+        for key in self._keys if keys is None else keys:
+            self[key]
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return [self[key] for key in self._keys]
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(list(self._keys))
+
+    def __len__(self):
+        return len(self._keys)